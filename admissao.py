@@ -0,0 +1,181 @@
+import math
+import time
+
+import discord
+from discord.ext import commands
+
+from metricas import metricas
+
+# === Limites por comando ===
+# Comandos que mexem no livro caixa: (rajada, fichas por segundo) do balde
+# de cada usuário e do balde de cada servidor. Comandos fora daqui não
+# passam pela admissão. Os botões que mexem no livro entram como
+# "botao:<rota>", com baldes próprios: entrar numa rinha não gasta as
+# fichas do brinha de quem a abriu.
+LIMITES = {
+    "daily": ((2, 0.2), (30, 10.0)),
+    "work": ((2, 0.2), (30, 10.0)),
+    "vipclaim": ((2, 0.2), (30, 10.0)),
+    "vipedit": ((2, 0.2), (20, 5.0)),
+    "copo": ((3, 0.5), (20, 5.0)),
+    "bet": ((3, 0.5), (20, 5.0)),
+    "duelar": ((3, 0.5), (20, 5.0)),
+    "rinha": ((2, 0.2), (10, 2.0)),
+    "extrato": ((3, 0.5), (20, 5.0)),
+    "adicionar": ((2, 0.2), (5, 1.0)),
+    "remover": ((2, 0.2), (5, 1.0)),
+    "setvip": ((2, 0.2), (5, 1.0)),
+    "addgive": ((2, 0.2), (5, 1.0)),
+    "botao:work": ((2, 0.2), (30, 10.0)),
+    "botao:extrato": ((5, 1.0), (30, 10.0)),
+    "botao:duelo": ((3, 0.5), (20, 5.0)),
+    "botao:copo": ((3, 0.5), (20, 5.0)),
+    "botao:aposta": ((3, 0.5), (20, 5.0)),
+    "botao:rinha": ((3, 0.5), (50, 20.0)),
+}
+PREFIXO_BOTAO = "botao:"
+
+# Comandos limitados em andamento ao mesmo tempo neste processo (cada um é
+# trabalho pendente no livro caixa); acima disso os novos são recusados
+LIMITE_EM_ANDAMENTO = 200
+# Intervalo mínimo (segundos) entre dois avisos de recusa para o mesmo
+# usuário, para o aviso não virar spam também
+INTERVALO_AVISO = 10.0
+# A cada quantas admissões os baldes já cheios (inativos) são descartados
+PURGA_A_CADA = 1000
+
+AVISOS = {
+    "usuario": "⏳ Devagar, {mencao}! Tente de novo em {espera}s.",
+    "servidor": "🚦 Muitos comandos neste servidor agora. Tente de novo em {espera}s.",
+    "sobrecarga": "🚦 O Banguela está sobrecarregado no momento. Tente de novo em alguns segundos.",
+}
+
+
+class Recusado(commands.CommandError):
+    def __init__(self, motivo):
+        super().__init__(f"Comando recusado: {motivo}")
+        self.motivo = motivo
+
+
+# === Balde de fichas ===
+class Balde:
+    __slots__ = ("fichas", "momento")
+
+    def __init__(self, rajada, momento):
+        self.fichas = rajada
+        self.momento = momento
+
+    def espera(self, rajada, taxa, momento):
+        # Repõe as fichas do tempo passado; 0 se há uma ficha para gastar,
+        # senão quanto falta (segundos) para a próxima
+        self.fichas = min(rajada, self.fichas + (momento - self.momento) * taxa)
+        self.momento = momento
+        return 0 if self.fichas >= 1 else (1 - self.fichas) / taxa
+
+    def cheio(self, rajada, taxa, momento):
+        return self.fichas + (momento - self.momento) * taxa >= rajada
+
+
+# === Admissão ===
+# Chamada no before_invoke do bot, depois dos checks e da leitura dos
+# argumentos: só comandos válidos gastam fichas. O after_invoke devolve a
+# vaga do comando em andamento. Os cliques passam pelo admitir_clique, no
+# roteador de componentes, que devolve a vaga quando o handler termina.
+class Admissao:
+    def __init__(self, limites=LIMITES, limite_em_andamento=LIMITE_EM_ANDAMENTO):
+        self.limites = limites
+        self.limite_em_andamento = limite_em_andamento
+        self.em_andamento = 0
+        # (comando, escopo, id) -> Balde
+        self.baldes = {}
+        self.avisos = {}
+        self._admissoes = 0
+        for comando, (usuario, servidor) in limites.items():
+            for escopo, (rajada, taxa) in (("usuario", usuario), ("servidor", servidor)):
+                metricas.definir("admissao_limite_rajada", rajada, comando=comando, escopo=escopo)
+                metricas.definir("admissao_limite_taxa", taxa, comando=comando, escopo=escopo)
+        metricas.definir("admissao_limite_em_andamento", limite_em_andamento)
+        metricas.definir("admissao_em_andamento", 0)
+
+    def verificar(self, comando, user_id, guild_id, momento=None):
+        # None se o comando pode rodar (e já gasta as fichas), senão
+        # (motivo, segundos até tentar de novo)
+        limite = self.limites.get(comando)
+        if limite is None:
+            return None
+        momento = time.monotonic() if momento is None else momento
+        self._admissoes += 1
+        if self._admissoes % PURGA_A_CADA == 0:
+            self._purgar(momento)
+        if self.em_andamento >= self.limite_em_andamento:
+            return "sobrecarga", 0
+        baldes = []
+        for escopo, chave, (rajada, taxa) in (("usuario", user_id, limite[0]), ("servidor", guild_id, limite[1])):
+            if chave is None:
+                continue
+            balde = self.baldes.get((comando, escopo, chave))
+            if balde is None:
+                balde = self.baldes[(comando, escopo, chave)] = Balde(rajada, momento)
+            espera = balde.espera(rajada, taxa, momento)
+            if espera:
+                return escopo, espera
+            baldes.append(balde)
+        # Só gasta quando todos os baldes têm ficha
+        for balde in baldes:
+            balde.fichas -= 1
+        self.em_andamento += 1
+        metricas.definir("admissao_em_andamento", self.em_andamento)
+        return None
+
+    def concluir(self):
+        self.em_andamento -= 1
+        metricas.definir("admissao_em_andamento", self.em_andamento)
+
+    async def admitir(self, ctx):
+        comando = ctx.command.qualified_name
+        recusa = self.verificar(comando, ctx.author.id, ctx.guild.id if ctx.guild else None)
+        if recusa is None:
+            ctx.admitido = comando in self.limites
+            return
+        motivo, espera = recusa
+        metricas.contar("admissao_recusas", comando=comando, motivo=motivo)
+        momento = time.monotonic()
+        if momento - self.avisos.get(ctx.author.id, -INTERVALO_AVISO) >= INTERVALO_AVISO:
+            self.avisos[ctx.author.id] = momento
+            try:
+                await ctx.reply(AVISOS[motivo].format(mencao=ctx.author.mention, espera=math.ceil(espera)))
+            except discord.HTTPException:
+                pass
+        raise Recusado(motivo)
+
+    async def admitir_clique(self, interaction, rota):
+        # True se o clique ocupa uma vaga (concluir() a devolve), False se
+        # a rota não é limitada; recusado, responde só para quem clicou
+        comando = PREFIXO_BOTAO + rota
+        recusa = self.verificar(comando, interaction.user.id, interaction.guild_id)
+        if recusa is None:
+            return comando in self.limites
+        motivo, espera = recusa
+        metricas.contar("admissao_recusas", comando=comando, motivo=motivo)
+        try:
+            await interaction.response.send_message(
+                AVISOS[motivo].format(mencao=interaction.user.mention, espera=math.ceil(espera)), ephemeral=True)
+        except discord.HTTPException:
+            pass
+        raise Recusado(motivo)
+
+    def liberar(self, ctx):
+        if getattr(ctx, "admitido", False):
+            ctx.admitido = False
+            self.concluir()
+
+    def _purgar(self, momento):
+        # Balde cheio é igual a balde novo: pode sair
+        for chave, balde in list(self.baldes.items()):
+            usuario, servidor = self.limites[chave[0]]
+            rajada, taxa = usuario if chave[1] == "usuario" else servidor
+            if balde.cheio(rajada, taxa, momento):
+                del self.baldes[chave]
+        for uid, aviso in list(self.avisos.items()):
+            if momento - aviso >= INTERVALO_AVISO:
+                del self.avisos[uid]
@@ -0,0 +1,185 @@
+import sys
+import time
+from array import array
+
+from modelo import centavos
+
+# === Economia agregada ===
+# Totais mantidos a cada transação, para o beconomia não varrer históricos:
+#   {"categorias": {categoria: [quantidade, receitas, despesas]},
+#    "dias": {"AAAA-MM-DD": {categoria: [quantidade, receitas, despesas]}}}
+# Valores em centavos. A oferta (soma dos saldos) não é gravada: sai dos
+# saldos no carregar e segue cada alterar_saldo.
+# A categoria vem do começo da descrição; o resto (nomes etc.) é ignorado.
+CATEGORIAS = {
+    "Recompensa diária": "daily",
+    "Salário do trabalho": "work",
+    "Recompensa VIP": "vipclaim",
+    "Acertou o copo": "copo",
+    "Errou o copo": "copo",
+    "Entrou na rinha": "rinha",
+    "Ganhou a rinha": "rinha",
+    "Perdeu duelo": "duelo",
+    "Ganhou duelo": "duelo",
+    "Perdeu aposta cara ou coroa": "bet",
+    "Venceu aposta cara ou coroa": "bet",
+    "Adicionado por": "admin",
+    "Removido por": "admin",
+}
+OUTROS = "outros"
+
+
+def economia_vazia():
+    return {"categorias": {}, "dias": {}}
+
+
+def categoria(descricao):
+    for prefixo, nome in CATEGORIAS.items():
+        if descricao.startswith(prefixo):
+            return nome
+    return OUTROS
+
+
+def acumular(economia, dia, categoria, tipo, valor):
+    for linhas in (economia["categorias"], economia["dias"].setdefault(dia, {})):
+        linha = linhas.setdefault(categoria, [0, 0, 0])
+        linha[0] += 1
+        linha[1 if tipo == "receita" else 2] += valor
+
+
+def acumular_transacao(economia, transacao):
+    # Transação no formato gravado (reais, data em texto)
+    acumular(economia, transacao["data"][:10], categoria(transacao["descricao"]),
+             transacao["tipo"], centavos(transacao["valor"]))
+
+
+class Agregados:
+    def __init__(self, economia=None):
+        self.economia = economia if economia is not None else economia_vazia()
+        self.oferta = 0
+        # descrição -> categoria, para não repetir a busca por prefixo
+        self._categorias = {}
+
+    def registrar(self, dia, tipo, valor, descricao):
+        nome = self._categorias.get(descricao)
+        if nome is None:
+            nome = self._categorias[descricao] = categoria(descricao)
+        acumular(self.economia, dia, nome, tipo, valor)
+
+    def resumo(self, dias):
+        # Oferta, totais por categoria e os últimos "dias" dias com
+        # movimento: só depende do número de categorias e de dias pedidos
+        ultimos = sorted(self.economia["dias"])[-dias:] if dias else []
+        return {
+            "oferta": self.oferta,
+            "categorias": {nome: list(linha) for nome, linha in self.economia["categorias"].items()},
+            "dias": {dia: {nome: list(linha) for nome, linha in self.economia["dias"][dia].items()}
+                     for dia in ultimos},
+        }
+
+
+# === Recálculo em lote ===
+# Refaz os agregados a partir do histórico completo (janela quente +
+# arquivo) exportado em colunas, com NumPy (opcional, só para esta
+# ferramenta). Serve para preencher bases antigas e para conferir os
+# totais mantidos a cada transação.
+#   python agregados.py financas.json [--sqlite financas.db] [--gravar]
+def exportar_colunas(armazenamento, dados):
+    dias, categorias = {}, {}
+    colunas = {"dia": array("q"), "categoria": array("q"), "receita": array("b"), "valor": array("q")}
+
+    def adicionar(transacoes):
+        for t in transacoes:
+            colunas["dia"].append(dias.setdefault(t["data"][:10], len(dias)))
+            colunas["categoria"].append(categorias.setdefault(categoria(t["descricao"]), len(categorias)))
+            colunas["receita"].append(t["tipo"] == "receita")
+            colunas["valor"].append(centavos(t["valor"]))
+
+    for usuario in dados["usuarios"].values():
+        adicionar(usuario.get("transacoes", []))
+    for _, transacoes in armazenamento.exportar_arquivo():
+        adicionar(transacoes)
+    return colunas, list(dias), list(categorias)
+
+
+def recalcular(colunas, dias, categorias):
+    import numpy as np
+
+    dia = np.frombuffer(colunas["dia"], dtype=np.int64)
+    chave = dia * len(categorias) + np.frombuffer(colunas["categoria"], dtype=np.int64)
+    receita = np.frombuffer(colunas["receita"], dtype=np.int8).astype(bool)
+    valor = np.frombuffer(colunas["valor"], dtype=np.int64)
+    tamanho = len(dias) * len(categorias)
+    quantidade = np.bincount(chave, minlength=tamanho)
+    receitas = np.bincount(chave, weights=np.where(receita, valor, 0), minlength=tamanho).astype(np.int64)
+    despesas = np.bincount(chave, weights=np.where(receita, 0, valor), minlength=tamanho).astype(np.int64)
+
+    economia = economia_vazia()
+    for indice in np.flatnonzero(quantidade):
+        linha = [int(quantidade[indice]), int(receitas[indice]), int(despesas[indice])]
+        dia_texto, nome = dias[indice // len(categorias)], categorias[indice % len(categorias)]
+        economia["dias"].setdefault(dia_texto, {})[nome] = linha
+        total = economia["categorias"].setdefault(nome, [0, 0, 0])
+        for i in range(3):
+            total[i] += linha[i]
+    return economia
+
+
+def diferencas(esperado, atual):
+    linhas = []
+    for nome in sorted(set(esperado["categorias"]) | set(atual["categorias"])):
+        if esperado["categorias"].get(nome) != atual["categorias"].get(nome):
+            linhas.append(f"{nome}: recalculado {esperado['categorias'].get(nome)} != mantido {atual['categorias'].get(nome)}")
+    dias = [dia for dia in sorted(set(esperado["dias"]) | set(atual["dias"]))
+            if esperado["dias"].get(dia) != atual["dias"].get(dia)]
+    if dias:
+        linhas.append(f"{len(dias)} dia(s) diferentes, ex.: {', '.join(dias[:5])}")
+    return linhas
+
+
+def principal(argumentos):
+    from armazenamento import ArmazenamentoJSON, ArmazenamentoSQLite
+    from livro_caixa import LivroCaixa
+
+    if not argumentos or argumentos[0].startswith("--"):
+        raise SystemExit("Uso: python agregados.py <financas.json> [--sqlite <financas.db>] [--gravar]")
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise SystemExit("O recálculo usa NumPy: pip install numpy")
+
+    def abrir(converter):
+        if "--sqlite" in argumentos:
+            return ArmazenamentoSQLite(argumentos[argumentos.index("--sqlite") + 1])
+        return ArmazenamentoJSON(argumentos[0], converter=converter)
+
+    # Só leitura: um financas.json antigo continua como está
+    armazenamento = abrir(False)
+    dados = armazenamento.carregar()
+    inicio = time.perf_counter()
+    colunas, dias, categorias = exportar_colunas(armazenamento, dados)
+    exportacao = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    economia = recalcular(colunas, dias, categorias)
+    calculo = time.perf_counter() - inicio
+    armazenamento.fechar()
+    print(f"{len(colunas['valor'])} transações: exportação {exportacao:.2f}s, recálculo {calculo:.2f}s")
+
+    erros = diferencas(economia, dados["economia"])
+    for linha in erros:
+        print(f"⚠️ {linha}")
+    if not erros:
+        print("✅ Agregados mantidos conferem com o histórico")
+    elif "--gravar" in argumentos:
+        # Como no bot: um financas.json antigo já vira segmentos aqui
+        livro = LivroCaixa(abrir(True))
+        livro.carregar()
+        livro.substituir_economia(economia)
+        livro.salvar(compactar=True)
+        livro.armazenamento.fechar()
+        print("💾 Agregados recalculados gravados")
+    return 1 if erros and "--gravar" not in argumentos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(principal(sys.argv[1:]))
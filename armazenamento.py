@@ -0,0 +1,746 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import logging
+import time
+
+from agregados import acumular_transacao, economia_vazia
+from metricas import metricas
+
+log = logging.getLogger(__name__)
+
+# As operações geradas pelo livro caixa são tuplas:
+#   ("saldo", uid, saldo)              -> saldo atual do usuário
+#   ("transacao", uid, transacao)      -> nova entrada no histórico
+#   ("arquivo", uid, [transacoes])     -> entradas mais antigas que saem da
+#                                         janela quente para o arquivo
+#   ("vip", uid, vip | None)           -> VIP criado/alterado/removido
+#   ("autorizado", user_id, bool)      -> permissão concedida/revogada
+#   ("cooldown", uid, [nome, expira])  -> cooldown até o epoch "expira"
+#   ("economia", None, economia)       -> agregados recalculados (ver
+#                                         agregados.py) no lugar dos atuais
+# Cada "transacao" também soma nos agregados da economia.
+
+
+def dados_vazios():
+    return {"usuarios": {}, "vips": {}, "autorizados": [], "cooldowns": {}, "economia": economia_vazia()}
+
+
+def ler_json(arquivo):
+    if not os.path.exists(arquivo):
+        return dados_vazios()
+    with open(arquivo, "r") as f:
+        dados = json.load(f)
+    for chave, valor in dados_vazios().items():
+        dados.setdefault(chave, valor)
+    return dados
+
+
+def aplicar(dados, op):
+    tipo, chave, valor = op
+    if tipo in ("saldo", "transacao"):
+        usuario = dados["usuarios"].setdefault(chave, {"saldo": 0, "transacoes": []})
+        if tipo == "saldo":
+            usuario["saldo"] = valor
+        else:
+            usuario["transacoes"].append(valor)
+            acumular_transacao(dados["economia"], valor)
+    elif tipo == "arquivo":
+        # No disco o arquivo já foi gravado junto com a operação; aqui só
+        # tira as entradas da janela quente.
+        del dados["usuarios"][chave]["transacoes"][:len(valor)]
+    elif tipo == "vip":
+        if valor is None:
+            dados["vips"].pop(chave, None)
+        else:
+            dados["vips"][chave] = valor
+    elif tipo == "autorizado":
+        if valor and chave not in dados["autorizados"]:
+            dados["autorizados"].append(chave)
+        elif not valor and chave in dados["autorizados"]:
+            dados["autorizados"].remove(chave)
+    elif tipo == "cooldown":
+        nome, expira = valor
+        dados["cooldowns"].setdefault(nome, {})[chave] = expira
+    elif tipo == "economia":
+        dados["economia"] = valor
+
+
+# === Resumos do arquivo ===
+# Por usuário: {dia: {descricao: [quantidade, receitas, despesas]}}
+def acumular_resumo(resumo, transacoes):
+    for t in transacoes:
+        linha = resumo.setdefault(t["data"][:10], {}).setdefault(t["descricao"], [0, 0, 0])
+        linha[0] += 1
+        linha[1 if t["tipo"] == "receita" else 2] += t["valor"]
+    return resumo
+
+
+def ler_linhas_do_fim(caminho, bloco=65536):
+    # Lê um arquivo de linhas de trás para frente sem carregá-lo inteiro
+    with open(caminho, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        posicao = f.tell()
+        resto = b""
+        while posicao > 0:
+            tamanho = min(bloco, posicao)
+            posicao -= tamanho
+            f.seek(posicao)
+            partes = (f.read(tamanho) + resto).split(b"\n")
+            resto = partes.pop(0)
+            for linha in reversed(partes):
+                if linha:
+                    yield linha
+        if resto:
+            yield resto
+
+
+# === JSON (segmentos + diário) ===
+# Cada gravação só acrescenta as operações novas ao diário
+# (financas.json.diario.<N>, uma operação JSON por linha). A compactação
+# abre o diário N + 1 e grava em <financas.json>.segmentos/ um segmento
+# N + 1 (NNNNNNNN.json, ou .json.gz) só com os usuários alterados desde a
+# anterior, e por último meta.json com VIPs, autorizados, cooldowns,
+# "geracao": N + 1 e a lista dos segmentos vivos, do mais antigo (a base)
+# ao mais novo; um usuário vale pelo segmento mais novo em que aparece.
+# Passando de LIMITE_SEGMENTOS, os mais novos são juntados num só e, se
+# esse passar de metade da base, tudo vira uma base nova.
+# Ao iniciar, os diários com número >= geracao são reaplicados, pulando as
+# operações de usuários cujo segmento é mais novo que o diário
+# (compactação interrompida). Todo arquivo é gravado em .tmp e trocado
+# com os.replace.
+LIMITE_SEGMENTOS = 8
+NIVEL_GZIP = 6
+OPERACOES_USUARIO = ("saldo", "transacao", "arquivo")
+
+
+def gravar_atomico(caminho, conteudo):
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def compacto(dados):
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class ArmazenamentoJSON:
+    # converter=True: sem segmentos ainda (ex.: financas.json no formato
+    # antigo, de documento único), o carregar já grava todos
+    def __init__(self, arquivo, comprimir=False, converter=True):
+        self.arquivo = arquivo
+        self.pasta_arquivo = arquivo + ".arquivo"
+        self.pasta_segmentos = arquivo + ".segmentos"
+        self.comprimir = comprimir
+        self.converter = converter
+        self.geracao = 0
+        self.diario = None
+        # [[geracao, usuarios], ...] como em meta.json
+        self.vivos = []
+        # Usuários reaplicados dos diários no carregar: ainda não estão nos
+        # segmentos e entram na próxima compactação
+        self.nao_compactados = set()
+        # Operações "arquivo" já no diário e ainda não no arquivo frio:
+        # [(uid, transacoes, [diario, posicao])]
+        self.arquivar_pendentes = []
+
+    def _caminho_diario(self, numero):
+        return f"{self.arquivo}.diario.{numero}"
+
+    def _diarios(self):
+        pasta = os.path.dirname(os.path.abspath(self.arquivo))
+        prefixo = os.path.basename(self.arquivo) + ".diario."
+        numeros = []
+        for nome in os.listdir(pasta):
+            if nome.startswith(prefixo) and nome[len(prefixo):].isdigit():
+                numeros.append(int(nome[len(prefixo):]))
+        return sorted(numeros)
+
+    # === Segmentos ===
+    def _caminho_meta(self):
+        return os.path.join(self.pasta_segmentos, "meta.json")
+
+    def _caminho_segmento(self, geracao, comprimido):
+        return os.path.join(self.pasta_segmentos, f"{geracao:08d}.json" + (".gz" if comprimido else ""))
+
+    def _ler_meta(self):
+        if not os.path.exists(self._caminho_meta()):
+            return None
+        with open(self._caminho_meta(), "rb") as f:
+            return json.loads(f.read())
+
+    def _ler_segmento(self, geracao):
+        # Pode ter sido gravado antes de a opção de compressão mudar
+        for comprimido in (self.comprimir, not self.comprimir):
+            caminho = self._caminho_segmento(geracao, comprimido)
+            if os.path.exists(caminho):
+                with open(caminho, "rb") as f:
+                    bruto = f.read()
+                return json.loads(gzip.decompress(bruto) if comprimido else bruto)
+        raise FileNotFoundError(self._caminho_segmento(geracao, self.comprimir))
+
+    def _gravar_segmento(self, geracao, usuarios):
+        with metricas.cronometrar("serializacao_segundos", etapa="segmento"):
+            conteudo = compacto(usuarios)
+            if self.comprimir:
+                conteudo = gzip.compress(conteudo, compresslevel=NIVEL_GZIP)
+        metricas.contar("serializacao_bytes", len(conteudo), etapa="segmento")
+        metricas.contar("segmentos_gravados")
+        gravar_atomico(self._caminho_segmento(geracao, self.comprimir), conteudo)
+
+    def _juntar(self, vivos, geracao):
+        base, *novos = vivos
+        juntos = {}
+        for g, _ in novos:
+            juntos.update(self._ler_segmento(g))
+        if len(juntos) * 2 > base[1]:
+            usuarios = self._ler_segmento(base[0])
+            usuarios.update(juntos)
+            self._gravar_segmento(geracao, usuarios)
+            return [[geracao, len(usuarios)]]
+        self._gravar_segmento(geracao, juntos)
+        return [base, [geracao, len(juntos)]]
+
+    def _remover_mortos(self):
+        vivos = {g for g, _ in self.vivos}
+        for nome in os.listdir(self.pasta_segmentos):
+            numero = nome.split(".")[0]
+            if numero.isdigit() and int(numero) not in vivos:
+                os.remove(os.path.join(self.pasta_segmentos, nome))
+
+    def carregar(self):
+        self.nao_compactados = set()
+        meta = self._ler_meta()
+        geracoes = {}
+        if meta is None:
+            # Ainda sem segmentos: financas.json antigo (ou nada)
+            dados = ler_json(self.arquivo)
+            self.geracao = dados.pop("geracao", 0)
+            self.vivos = []
+        else:
+            self.geracao = meta.pop("geracao")
+            self.vivos = meta.pop("vivos")
+            dados = {**dados_vazios(), **meta}
+            for g, _ in self.vivos:
+                for uid, usuario in self._ler_segmento(g).items():
+                    dados["usuarios"][uid] = usuario
+                    geracoes[uid] = g
+        base = self.geracao
+        for numero in self._diarios():
+            if numero < base:
+                os.remove(self._caminho_diario(numero))
+                continue
+            corte = None
+            with open(self._caminho_diario(numero), "r") as f:
+                posicao = 0
+                for linha in f:
+                    marca, posicao = [numero, posicao], posicao + len(linha.encode())
+                    try:
+                        op = json.loads(linha) if linha.endswith("\n") else None
+                    except ValueError:
+                        op = None
+                    if op is None:
+                        # Última linha incompleta de uma queda durante a escrita
+                        corte = marca[1]
+                        break
+                    if op[0] in OPERACOES_USUARIO:
+                        if geracoes.get(op[1], 0) > numero:
+                            continue
+                        self.nao_compactados.add(op[1])
+                    if op[0] == "arquivo":
+                        # Pode ter caído entre o diário e o arquivo frio; o
+                        # que já foi arquivado é pulado na próxima gravação
+                        self.arquivar_pendentes.append((op[1], op[2], marca))
+                    aplicar(dados, op)
+            if corte is not None:
+                # Sem o pedaço: o que for gravado depois começa numa linha
+                # nova em vez de grudar nele (e sumir no próximo carregar)
+                log.warning("Diário %s cortado em %d bytes (linha incompleta)", numero, corte)
+                os.truncate(self._caminho_diario(numero), corte)
+            self.geracao = numero
+        self._abrir_diario()
+        if meta is None and self.converter:
+            self.compactar(self.instantaneo(dados))
+            self.nao_compactados = set()
+        return dados
+
+    def _abrir_diario(self):
+        if self.diario is not None:
+            self.diario.close()
+        self.diario = open(self._caminho_diario(self.geracao), "a")
+
+    def persistir(self, operacoes):
+        if self.diario is None:
+            self._abrir_diario()
+        # Sobra de um lote anterior; se falhar de novo, este lote volta
+        # inteiro para a fila sem nada dele ter sido gravado
+        self._arquivar_pendentes()
+        with metricas.cronometrar("serializacao_segundos", etapa="diario"):
+            linhas = [json.dumps(op) + "\n" for op in operacoes]
+        texto = "".join(linhas)
+        metricas.contar("serializacao_bytes", len(texto), etapa="diario")
+        posicao = os.fstat(self.diario.fileno()).st_size
+        try:
+            self.diario.write(texto)
+            self.diario.flush()
+            os.fsync(self.diario.fileno())
+        except OSError:
+            # O lote volta inteiro para a fila: nada dele pode ficar no
+            # diário, senão a nova tentativa o gravaria duas vezes
+            self._cortar_diario(posicao)
+            raise
+        # O arquivo frio só depois do diário no disco. Daqui em diante o
+        # lote não pode voltar para a fila (o diário já o tem): uma falha
+        # deixa o resto pendente para a próxima gravação.
+        for op, linha in zip(operacoes, linhas):
+            if op[0] == "arquivo":
+                self.arquivar_pendentes.append((op[1], op[2], [self.geracao, posicao]))
+            posicao += len(linha.encode())
+        try:
+            self._arquivar_pendentes()
+        except OSError:
+            log.exception("Falha ao gravar o arquivo frio; fica para a próxima gravação")
+
+    def _cortar_diario(self, tamanho):
+        try:
+            self.diario.close()
+        except OSError:
+            pass
+        self.diario = None
+        os.truncate(self._caminho_diario(self.geracao), tamanho)
+        self._abrir_diario()
+
+    def _arquivar_pendentes(self):
+        while self.arquivar_pendentes:
+            self._arquivar(*self.arquivar_pendentes[0])
+            self.arquivar_pendentes.pop(0)
+
+    # Arquivo frio: <financas.json>.arquivo/<uid>.jsonl com as entradas em
+    # ordem cronológica e <uid>.resumo.json com os totais por dia/descrição.
+    # Cada operação "arquivo" é identificada pela posição dela no diário
+    # ([número do diário, byte]); o resumo guarda em "_arquivo" a última
+    # aplicada e o tamanho do .jsonl depois dela. Reaplicar a mesma
+    # operação (nova tentativa, reabertura do diário) não faz nada, e um
+    # .jsonl que cresceu sem o resumo acompanhar (queda entre os dois) é
+    # cortado de volta antes de receber as entradas.
+    def _arquivar(self, uid, transacoes, marca):
+        os.makedirs(self.pasta_arquivo, exist_ok=True)
+        base = os.path.join(self.pasta_arquivo, uid)
+        resumo = self._ler_resumo(uid)
+        feito = resumo.pop("_arquivo", None)
+        if feito is not None and feito[0] >= marca:
+            return
+        with open(base + ".jsonl", "a") as f:
+            if feito is not None and os.fstat(f.fileno()).st_size > feito[1]:
+                f.truncate(feito[1])
+            f.write("".join(json.dumps(t) + "\n" for t in transacoes))
+            f.flush()
+            os.fsync(f.fileno())
+            tamanho = os.fstat(f.fileno()).st_size
+        acumular_resumo(resumo, transacoes)
+        resumo["_arquivo"] = [marca, tamanho]
+        gravar_atomico(base + ".resumo.json", compacto(resumo))
+
+    def exportar_arquivo(self):
+        if not os.path.isdir(self.pasta_arquivo):
+            return
+        for nome in sorted(os.listdir(self.pasta_arquivo)):
+            if nome.endswith(".jsonl"):
+                with open(os.path.join(self.pasta_arquivo, nome), "r") as f:
+                    yield nome[:-len(".jsonl")], [json.loads(linha) for linha in f if linha.strip()]
+
+    def ler_arquivo(self, uid, inicio, quantidade):
+        caminho = os.path.join(self.pasta_arquivo, f"{uid}.jsonl")
+        if not os.path.exists(caminho):
+            return []
+        pagina = []
+        for i, linha in enumerate(ler_linhas_do_fim(caminho)):
+            if i >= inicio + quantidade:
+                break
+            if i >= inicio:
+                pagina.append(json.loads(linha))
+        return pagina
+
+    def _ler_resumo(self, uid):
+        caminho = os.path.join(self.pasta_arquivo, f"{uid}.resumo.json")
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, "r") as f:
+            return json.load(f)
+
+    def resumo_arquivo(self, uid):
+        resumo = self._ler_resumo(uid)
+        resumo.pop("_arquivo", None)
+        return resumo
+
+    def instantaneo(self, dados):
+        # Chamado no loop de eventos, sem operações pendentes: o conteúdo
+        # reflete tudo o que já foi entregue ao diário atual. "usuarios"
+        # traz só quem mudou desde a última compactação (já exportados,
+        # então podem ir para a thread do livro sem cópia).
+        geracao = self.geracao + 1
+        with metricas.cronometrar("serializacao_segundos", etapa="instantaneo"):
+            meta = compacto({**{chave: valor for chave, valor in dados.items() if chave != "usuarios"},
+                             "geracao": geracao})
+        metricas.contar("serializacao_bytes", len(meta), etapa="instantaneo")
+        return geracao, meta, dados["usuarios"]
+
+    def compactar(self, conteudo):
+        geracao, meta, alterados = conteudo
+        # Os diários antigos somem no fim: nada deles pode ficar por arquivar
+        self._arquivar_pendentes()
+        anterior = self.geracao
+        self.geracao = geracao
+        self._abrir_diario()
+        os.makedirs(self.pasta_segmentos, exist_ok=True)
+        vivos = list(self.vivos)
+        if alterados:
+            self._gravar_segmento(geracao, alterados)
+            vivos.append([geracao, len(alterados)])
+        if len(vivos) > LIMITE_SEGMENTOS:
+            vivos = self._juntar(vivos, geracao)
+        # A lista de segmentos vivos entra no meta já serializado. O
+        # meta.json vai por último: se cair antes, o próximo carregar ainda
+        # parte da geração anterior.
+        gravar_atomico(self._caminho_meta(), meta[:-1] + b',"vivos":' + compacto(vivos) + b"}")
+        self.vivos = vivos
+        self._remover_mortos()
+        for numero in self._diarios():
+            if numero <= anterior:
+                os.remove(self._caminho_diario(numero))
+
+    def fechar(self):
+        if self.diario is not None:
+            self.diario.close()
+            self.diario = None
+
+
+# === SQLite ===
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    id TEXT PRIMARY KEY,
+    saldo NUMERIC NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor NUMERIC NOT NULL,
+    descricao TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transacoes_usuario_data ON transacoes (user_id, data);
+CREATE INDEX IF NOT EXISTS idx_transacoes_data ON transacoes (data);
+CREATE TABLE IF NOT EXISTS arquivo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor NUMERIC NOT NULL,
+    descricao TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_arquivo_usuario ON arquivo (user_id, id);
+CREATE TABLE IF NOT EXISTS resumos (
+    user_id TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    receitas NUMERIC NOT NULL,
+    despesas NUMERIC NOT NULL,
+    PRIMARY KEY (user_id, dia, descricao)
+);
+CREATE TABLE IF NOT EXISTS vips (
+    user_id TEXT PRIMARY KEY,
+    expira_em TEXT NOT NULL,
+    ultimo_claim TEXT,
+    custom TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS autorizados (
+    user_id PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS cooldowns (
+    nome TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    expira INTEGER NOT NULL,
+    PRIMARY KEY (nome, user_id)
+);
+CREATE TABLE IF NOT EXISTS economia (
+    dia TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    receitas INTEGER NOT NULL,
+    despesas INTEGER NOT NULL,
+    PRIMARY KEY (dia, categoria)
+);
+"""
+
+
+# A tabela transacoes guarda só a janela quente (o mesmo que fica em
+# memória); as entradas antigas vão para a tabela arquivo.
+class ArmazenamentoSQLite:
+    def __init__(self, arquivo, arquivo_json=None):
+        self.arquivo = arquivo
+        novo = not os.path.exists(arquivo)
+        # A conexão é criada aqui mas usada pela thread de gravação do livro
+        self.conexao = sqlite3.connect(arquivo, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        # FULL: o WAL recebe fsync a cada commit, então quando confirmar()
+        # resolve a gravação já sobrevive a uma queda de energia
+        self.conexao.execute("PRAGMA synchronous=FULL")
+        self.conexao.executescript(ESQUEMA)
+        # Leituras de um usuário só (cache limitado do livro caixa). A
+        # hidratação roda na thread de E/S; só o fallback do cache (um
+        # usuário que não passou por garantir_usuarios) lê no loop de
+        # eventos, e com WAL não espera a gravação em andamento
+        self.leitura = sqlite3.connect(arquivo, check_same_thread=False)
+        # Tudo já vai direto para as tabelas; não há snapshot a refazer
+        self.nao_compactados = set()
+        if novo and arquivo_json and os.path.exists(arquivo_json):
+            importar_json(self, arquivo_json)
+
+    # historicos=False: só os saldos; a janela quente de cada usuário vem
+    # depois, pelo ler_usuario
+    def carregar(self, historicos=True):
+        dados = dados_vazios()
+        for uid, saldo in self.conexao.execute("SELECT id, saldo FROM usuarios"):
+            dados["usuarios"][uid] = {"saldo": saldo, "transacoes": []}
+        transacoes = self.conexao.execute(
+            "SELECT user_id, tipo, valor, descricao, data FROM transacoes ORDER BY id") if historicos else ()
+        for uid, tipo, valor, descricao, data in transacoes:
+            usuario = dados["usuarios"].setdefault(uid, {"saldo": 0, "transacoes": []})
+            usuario["transacoes"].append({"tipo": tipo, "valor": valor, "descricao": descricao, "data": data})
+        for uid, expira_em, ultimo_claim, custom in self.conexao.execute(
+                "SELECT user_id, expira_em, ultimo_claim, custom FROM vips"):
+            dados["vips"][uid] = {"expira_em": expira_em, "ultimo_claim": ultimo_claim, "custom": custom}
+        dados["autorizados"] = [uid for (uid,) in self.conexao.execute("SELECT user_id FROM autorizados")]
+        for nome, uid, expira in self.conexao.execute(
+                "SELECT nome, user_id, expira FROM cooldowns WHERE expira > ?", (int(time.time()),)):
+            dados["cooldowns"].setdefault(nome, {})[uid] = expira
+        for dia, categoria, *linha in self.conexao.execute(
+                "SELECT dia, categoria, quantidade, receitas, despesas FROM economia ORDER BY dia"):
+            dados["economia"]["dias"].setdefault(dia, {})[categoria] = linha
+            total = dados["economia"]["categorias"].setdefault(categoria, [0, 0, 0])
+            for i, valor in enumerate(linha):
+                total[i] += valor
+        return dados
+
+    def ler_usuario(self, uid):
+        linha = self.leitura.execute("SELECT saldo FROM usuarios WHERE id = ?", (uid,)).fetchone()
+        transacoes = [{"tipo": tipo, "valor": valor, "descricao": descricao, "data": data}
+                      for tipo, valor, descricao, data in self.leitura.execute(
+                          "SELECT tipo, valor, descricao, data FROM transacoes WHERE user_id = ? ORDER BY id", (uid,))]
+        if linha is None and not transacoes:
+            return None
+        return {"saldo": linha[0] if linha is not None else 0, "transacoes": transacoes}
+
+    def persistir(self, operacoes):
+        saldos = {}
+        transacoes = []
+        economia = economia_vazia()
+        with self.conexao:
+            for op in operacoes:
+                if op[0] == "saldo":
+                    saldos[op[1]] = op[2]
+                elif op[0] == "transacao":
+                    t = op[2]
+                    transacoes.append((op[1], t["tipo"], t["valor"], t["descricao"], t["data"]))
+                    acumular_transacao(economia, t)
+                elif op[0] == "economia":
+                    self._substituir_economia(op[2])
+                    economia = economia_vazia()
+                elif op[0] == "arquivo":
+                    self._inserir_transacoes(transacoes)
+                    transacoes = []
+                    self._arquivar(op[1], op[2])
+                elif op[0] == "vip":
+                    self._gravar_vip(op[1], op[2])
+                elif op[0] == "autorizado":
+                    self._gravar_autorizado(op[1], op[2])
+                elif op[0] == "cooldown":
+                    self._gravar_cooldown(op[1], *op[2])
+            self.conexao.executemany(
+                "INSERT INTO usuarios (id, saldo) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET saldo = excluded.saldo",
+                saldos.items())
+            self._inserir_transacoes(transacoes)
+            self._somar_economia(economia)
+
+    def _inserir_transacoes(self, transacoes):
+        self.conexao.executemany(
+            "INSERT INTO transacoes (user_id, tipo, valor, descricao, data) VALUES (?, ?, ?, ?, ?)",
+            transacoes)
+
+    def _arquivar(self, uid, transacoes):
+        self._inserir_arquivo(uid, transacoes)
+        self.conexao.execute(
+            "DELETE FROM transacoes WHERE id IN "
+            "(SELECT id FROM transacoes WHERE user_id = ? ORDER BY id LIMIT ?)",
+            (uid, len(transacoes)))
+
+    def _inserir_arquivo(self, uid, transacoes):
+        self.conexao.executemany(
+            "INSERT INTO arquivo (user_id, tipo, valor, descricao, data) VALUES (?, ?, ?, ?, ?)",
+            [(uid, t["tipo"], t["valor"], t["descricao"], t["data"]) for t in transacoes])
+        for dia, descricoes in acumular_resumo({}, transacoes).items():
+            for descricao, (quantidade, receitas, despesas) in descricoes.items():
+                self.conexao.execute(
+                    "INSERT INTO resumos (user_id, dia, descricao, quantidade, receitas, despesas) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(user_id, dia, descricao) DO UPDATE SET "
+                    "quantidade = quantidade + excluded.quantidade, "
+                    "receitas = receitas + excluded.receitas, despesas = despesas + excluded.despesas",
+                    (uid, dia, descricao, quantidade, receitas, despesas))
+
+    def ler_arquivo(self, uid, inicio, quantidade):
+        return [{"tipo": tipo, "valor": valor, "descricao": descricao, "data": data}
+                for tipo, valor, descricao, data in self.conexao.execute(
+                    "SELECT tipo, valor, descricao, data FROM arquivo WHERE user_id = ? "
+                    "ORDER BY id DESC LIMIT ? OFFSET ?", (uid, quantidade, inicio))]
+
+    def resumo_arquivo(self, uid):
+        resumo = {}
+        for dia, descricao, quantidade, receitas, despesas in self.conexao.execute(
+                "SELECT dia, descricao, quantidade, receitas, despesas FROM resumos WHERE user_id = ?", (uid,)):
+            resumo.setdefault(dia, {})[descricao] = [quantidade, receitas, despesas]
+        return resumo
+
+    def _somar_economia(self, economia):
+        self.conexao.executemany(
+            "INSERT INTO economia (dia, categoria, quantidade, receitas, despesas) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(dia, categoria) DO UPDATE SET quantidade = quantidade + excluded.quantidade, "
+            "receitas = receitas + excluded.receitas, despesas = despesas + excluded.despesas",
+            [(dia, categoria, *linha) for dia, categorias in economia["dias"].items()
+             for categoria, linha in categorias.items()])
+
+    def _substituir_economia(self, economia):
+        self.conexao.execute("DELETE FROM economia")
+        self._somar_economia(economia)
+
+    def exportar_arquivo(self):
+        uid, transacoes = None, []
+        for user_id, tipo, valor, descricao, data in self.conexao.execute(
+                "SELECT user_id, tipo, valor, descricao, data FROM arquivo ORDER BY user_id, id"):
+            if user_id != uid and transacoes:
+                yield uid, transacoes
+                transacoes = []
+            uid = user_id
+            transacoes.append({"tipo": tipo, "valor": valor, "descricao": descricao, "data": data})
+        if transacoes:
+            yield uid, transacoes
+
+    def _gravar_vip(self, uid, vip):
+        if vip is None:
+            self.conexao.execute("DELETE FROM vips WHERE user_id = ?", (uid,))
+            return
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO vips (user_id, expira_em, ultimo_claim, custom) VALUES (?, ?, ?, ?)",
+            (uid, vip["expira_em"], vip.get("ultimo_claim"), vip.get("custom") or ""))
+
+    def _gravar_autorizado(self, user_id, autorizado):
+        if autorizado:
+            self.conexao.execute("INSERT OR IGNORE INTO autorizados (user_id) VALUES (?)", (user_id,))
+        else:
+            self.conexao.execute("DELETE FROM autorizados WHERE user_id = ?", (user_id,))
+
+    def _gravar_cooldown(self, uid, nome, expira):
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO cooldowns (nome, user_id, expira) VALUES (?, ?, ?)", (nome, uid, expira))
+
+    def importar(self, dados, arquivo=()):
+        with self.conexao:
+            for uid, transacoes in arquivo:
+                self._inserir_arquivo(uid, transacoes)
+            for uid, usuario in dados["usuarios"].items():
+                self.conexao.execute("INSERT OR REPLACE INTO usuarios (id, saldo) VALUES (?, ?)",
+                                     (uid, usuario.get("saldo", 0)))
+                self.conexao.executemany(
+                    "INSERT INTO transacoes (user_id, tipo, valor, descricao, data) VALUES (?, ?, ?, ?, ?)",
+                    [(uid, t["tipo"], t["valor"], t["descricao"], t["data"]) for t in usuario.get("transacoes", [])])
+            for uid, vip in dados["vips"].items():
+                self._gravar_vip(uid, vip)
+            for user_id in dados.get("autorizados", []):
+                self._gravar_autorizado(user_id, True)
+            for nome, por_usuario in dados.get("cooldowns", {}).items():
+                for uid, expira in por_usuario.items():
+                    self._gravar_cooldown(uid, nome, expira)
+            self._substituir_economia(dados.get("economia", economia_vazia()))
+
+    def instantaneo(self, dados):
+        return None
+
+    def compactar(self, conteudo):
+        with self.conexao:
+            self.conexao.execute("DELETE FROM cooldowns WHERE expira <= ?", (int(time.time()),))
+        self.conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def fechar(self):
+        self.leitura.close()
+        self.conexao.close()
+
+
+def criar_armazenamento(tipo, arquivo_json, arquivo_sqlite, comprimir=False):
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(arquivo_sqlite, arquivo_json=arquivo_json)
+    return ArmazenamentoJSON(arquivo_json, comprimir=comprimir)
+
+
+def importar_json(banco, arquivo_json):
+    # Segmentos (ou financas.json antigo) + diários + arquivo frio do
+    # formato JSON
+    origem = ArmazenamentoJSON(arquivo_json, converter=False)
+    dados = origem.carregar()
+    origem.fechar()
+    banco.importar(dados, origem.exportar_arquivo())
+
+
+def migrar(arquivo_json, arquivo_sqlite):
+    if os.path.exists(arquivo_sqlite):
+        raise SystemExit(f"{arquivo_sqlite} já existe, nada foi migrado.")
+    banco = ArmazenamentoSQLite(arquivo_sqlite)
+    importar_json(banco, arquivo_json)
+    banco.fechar()
+
+
+def converter_segmentos(arquivo_json, comprimir=False):
+    # financas.json antigo -> <financas.json>.segmentos/, ou regrava os
+    # segmentos existentes numa base só (ex.: para trocar a compressão)
+    armazenamento = ArmazenamentoJSON(arquivo_json, comprimir=comprimir, converter=False)
+    dados = armazenamento.carregar()
+    armazenamento.vivos = []
+    armazenamento.compactar(armazenamento.instantaneo(dados))
+    armazenamento.fechar()
+    return len(dados["usuarios"])
+
+
+def exportar_documento(arquivo_json, saida):
+    # Segmentos + diários -> um único JSON no formato antigo do financas.json
+    origem = ArmazenamentoJSON(arquivo_json, converter=False)
+    dados = origem.carregar()
+    origem.fechar()
+    with open(saida, "w") as f:
+        json.dump(dados, f, indent=2)
+    return len(dados["usuarios"])
+
+
+USO = """Uso:
+  python armazenamento.py <financas.json> <financas.db>        JSON -> SQLite
+  python armazenamento.py --segmentos <financas.json> [--gzip]  financas.json antigo -> segmentos
+  python armazenamento.py --documento <financas.json> <saida>   segmentos -> financas.json antigo"""
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    if argumentos[:1] == ["--segmentos"] and len(argumentos) in (2, 3):
+        total = converter_segmentos(argumentos[1], comprimir="--gzip" in argumentos[2:])
+        print(f"✅ {argumentos[1]} convertido em segmentos ({total} usuários)")
+    elif argumentos[:1] == ["--documento"] and len(argumentos) == 3:
+        total = exportar_documento(argumentos[1], argumentos[2])
+        print(f"✅ {argumentos[2]} gravado no formato antigo ({total} usuários)")
+    elif len(argumentos) == 2 and not argumentos[0].startswith("--"):
+        migrar(argumentos[0], argumentos[1])
+        print(f"✅ {argumentos[0]} migrado para {argumentos[1]}")
+    else:
+        raise SystemExit(USO)
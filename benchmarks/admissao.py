@@ -0,0 +1,135 @@
+# Abuso: alguns usuários de um servidor mandam bcopo sem parar (comando e
+# clique, como um raid), a uma taxa fixa de mensagens como as que chegam
+# do gateway, enquanto usuários comuns de outros servidores jogam
+# normalmente. Roda com e sem a admissão (admissao.py) e compara a latência
+# dos usuários comuns e quanto do flood chegou ao livro caixa.
+# Usa os mesmos objetos falsos e comandos reais do carga.py.
+#   python benchmarks/admissao.py
+#   python benchmarks/admissao.py --spammers 50 --taxa 20000 --limite-p99 100
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import Canal, Contexto, Guilda, banguela, clicar, novo_membro, percentil
+from admissao import Admissao, Recusado
+from armazenamento import criar_armazenamento
+from livro_caixa import LivroCaixa
+from livro_rpc import LivroLocal
+from servicos import Servicos
+
+SERVIDORES_COMUNS = 200
+
+
+async def invocar(admissao, nome, ctx, *args):
+    # O mesmo caminho do bot: before_invoke, comando, after_invoke
+    comando = banguela.bot.get_command(nome)
+    ctx.command = comando
+    if admissao is not None:
+        try:
+            await admissao.admitir(ctx)
+        except Recusado:
+            return False
+    try:
+        await comando.callback(comando.cog, ctx, *args)
+    finally:
+        if admissao is not None:
+            admissao.liberar(ctx)
+    return True
+
+
+async def jogar_copo(admissao, ctx):
+    if await invocar(admissao, "copo", ctx, "100"):
+        await clicar(ctx.ultima, ctx.author, random.randrange(3), admissao, ctx.guild)
+        return True
+    return False
+
+
+async def rodada(args, com_admissao):
+    pasta = tempfile.mkdtemp(prefix="banguela-admissao-")
+    livro = LivroCaixa(criar_armazenamento(
+        args.armazenamento, os.path.join(pasta, "financas.json"), os.path.join(pasta, "financas.db")))
+    banguela.bot.servicos = Servicos(LivroLocal(livro))
+    await banguela.bot.servicos.livro.abrir()
+    for nome in banguela.COGS:
+        await banguela.bot.load_extension(f"cogs.{nome}")
+    admissao = Admissao() if com_admissao else None
+
+    canal, raid = Canal(), Guilda()
+    comuns = [Guilda() for _ in range(SERVIDORES_COMUNS)]
+    spammers = [novo_membro() for _ in range(args.spammers)]
+    latencias = []
+    contagem = {"flood": 0, "flood_recusado": 0, "comum_recusado": 0}
+    fim = asyncio.Event()
+
+    async def mensagem_spam():
+        if not await jogar_copo(admissao, Contexto(random.choice(spammers), canal, raid)):
+            contagem["flood_recusado"] += 1
+
+    async def flood():
+        # Cada mensagem vira uma tarefa, como os eventos do gateway: nada
+        # segura o ritmo além da própria admissão
+        tarefas = []
+        while not fim.is_set():
+            for _ in range(max(1, args.taxa // 100)):
+                tarefas.append(asyncio.create_task(mensagem_spam()))
+                contagem["flood"] += 1
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*tarefas)
+
+    async def comum():
+        ctx = Contexto(novo_membro(), canal, random.choice(comuns))
+        inicio = time.perf_counter()
+        if not await jogar_copo(admissao, ctx):
+            contagem["comum_recusado"] += 1
+        latencias.append(time.perf_counter() - inicio)
+
+    gerador = asyncio.create_task(flood())
+    semaforo = asyncio.Semaphore(args.concorrencia)
+
+    async def limitado():
+        async with semaforo:
+            await comum()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(limitado() for _ in range(args.operacoes)))
+    duracao = time.perf_counter() - inicio
+    fim.set()
+    await gerador
+    for nome in list(banguela.bot.extensions):
+        await banguela.bot.unload_extension(nome)
+    await banguela.bot.servicos.livro.fechar()
+    return latencias, duracao, contagem
+
+
+async def principal(args):
+    print(f"armazenamento={args.armazenamento} spammers={args.spammers} flood={args.taxa} msg/s "
+          f"comuns={args.operacoes} (concorrência {args.concorrencia})")
+    print(f"{'admissão':<9} {'p50':>9} {'p99':>9} {'comuns recusados':>17} {'flood aceito':>13} "
+          f"{'flood recusado':>15} {'duração':>8}")
+    estourou = False
+    for com_admissao in (False, True):
+        latencias, duracao, contagem = await rodada(args, com_admissao)
+        p50, p99 = (percentil(latencias, p) * 1000 for p in (0.50, 0.99))
+        aceito = contagem["flood"] - contagem["flood_recusado"]
+        print(f"{'sim' if com_admissao else 'não':<9} {p50:>7.2f}ms {p99:>7.2f}ms {contagem['comum_recusado']:>17} "
+              f"{aceito:>13} {contagem['flood_recusado']:>15} {duracao:>7.1f}s")
+        if com_admissao and args.limite_p99 is not None and p99 > args.limite_p99:
+            estourou = True
+    return 1 if estourou else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latência sob abuso, com e sem admissão")
+    parser.add_argument("--armazenamento", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--spammers", type=int, default=20)
+    parser.add_argument("--taxa", type=int, default=10000, help="mensagens de spam por segundo")
+    parser.add_argument("--operacoes", type=int, default=500, help="jogos de usuários comuns")
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--limite-p99", type=float, default=None, help="p99 máximo em ms com admissão")
+    sys.exit(asyncio.run(principal(parser.parse_args())))
@@ -0,0 +1,134 @@
+# Cache de usuários: livro caixa com todos os usuários carregados contra o
+# cache limitado (só saldos residentes, usuários hidratados sob demanda),
+# sobre o mesmo financas.db. Mede memória residente depois do carregar,
+# tempo de carga e latência de saldo/bal, extrato e lançamento em usuários
+# aleatórios (a maioria fora do cache), e quantos usuários foram
+# hidratados no loop de eventos e na thread de E/S (com o tempo total de
+# leitura). Cada modo roda num processo próprio para a memória de um não
+# contaminar a do outro.
+#   python benchmarks/cache.py
+#   python benchmarks/cache.py --usuarios 1000000 --cache 20000
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazenamento import ArmazenamentoSQLite
+from livro_caixa import LivroCaixa
+from livro_rpc import LivroLocal
+from metricas import metricas
+
+AMOSTRAS = 5000
+DESCRICOES = ["Recompensa diária", "Salário do trabalho", "Acertou o copo", "Entrou na rinha"]
+
+
+def gerar(arquivo, usuarios, transacoes):
+    ArmazenamentoSQLite(arquivo).fechar()
+    conexao = sqlite3.connect(arquivo)
+    with conexao:
+        conexao.executemany("INSERT INTO usuarios (id, saldo) VALUES (?, ?)",
+                            ((str(10 ** 17 + i), random.randint(0, 100_000) / 100) for i in range(usuarios)))
+        conexao.executemany(
+            "INSERT INTO transacoes (user_id, tipo, valor, descricao, data) VALUES (?, ?, ?, ?, ?)",
+            ((str(10 ** 17 + i), "receita", random.randint(1, 500), random.choice(DESCRICOES), "2025-06-06 18:51:52")
+             for i in range(usuarios) for _ in range(transacoes)))
+    conexao.close()
+
+
+def memoria_residente():
+    # Atual (Linux); senão o pico
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentis(latencias):
+    latencias = sorted(latencias)
+    return [latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1e6 for p in (0.50, 0.99)]
+
+
+async def medir(arquivo, usuarios, cache):
+    antes = memoria_residente()
+    inicio = time.perf_counter()
+    livro = LivroCaixa(ArmazenamentoSQLite(arquivo), limite_cache=cache)
+    livro.carregar()
+    carga = time.perf_counter() - inicio
+    memoria = memoria_residente() - antes
+    local = LivroLocal(livro)
+    livro.iniciar()
+    uids = [str(10 ** 17 + random.randrange(usuarios)) for _ in range(AMOSTRAS)]
+    resultado = {"carga": carga, "memoria": memoria}
+
+    async def cronometrar(nome, chamar):
+        latencias = []
+        for uid in uids:
+            inicio = time.perf_counter()
+            await chamar(uid)
+            latencias.append(time.perf_counter() - inicio)
+        resultado[nome] = percentis(latencias)
+
+    await cronometrar("saldo", local.saldo)
+    await cronometrar("extrato", lambda uid: local.extrato(uid, 0, 10))
+    await cronometrar("lancar", lambda uid: local.lancar(uid, 100, "Recompensa diária"))
+    await livro.confirmar()
+    resultado["hidratacoes"] = [metricas.contadores.get(("cache_usuarios_hidratacoes", (("via", via),)), 0)
+                                for via in ("loop", "executor")]
+    leitura = metricas.por_rotulo("armazenamento_segundos", "operacao").get("hidratar")
+    resultado["leitura"] = leitura.soma if leitura is not None else 0.0
+    resultado["residentes"] = livro.usuarios.residentes
+    resultado["contadores"] = [metricas.total(f"cache_usuarios_{nome}") for nome in ("acertos", "faltas", "despejos")]
+    await livro.encerrar()
+    return resultado
+
+
+def rodar(arquivo, usuarios, cache, fila):
+    random.seed(1)
+    fila.put(asyncio.run(medir(arquivo, usuarios, cache)))
+
+
+def principal():
+    parser = argparse.ArgumentParser(description="Memória e latência do cache de usuários")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--transacoes", type=int, default=10, help="transações na janela quente de cada usuário")
+    parser.add_argument("--cache", type=int, default=2_000, help="usuários hidratados no modo limitado")
+    args = parser.parse_args()
+    contexto = multiprocessing.get_context("spawn")
+    print(f"{'usuários':>9} {'modo':<14} {'carga':>7} {'memória':>9} {'saldo p50/p99':>15} "
+          f"{'extrato p50/p99':>17} {'lançar p50/p99':>16} {'hidratados loop/E/S':>19} {'leitura':>8} "
+          f"{'residentes':>10}  acertos/faltas/despejos")
+    for usuarios in args.usuarios:
+        pasta = tempfile.mkdtemp(prefix="banguela-cache-")
+        try:
+            arquivo = os.path.join(pasta, "financas.db")
+            gerar(arquivo, usuarios, args.transacoes)
+            for rotulo, cache in (("tudo carregado", None), (f"cache {args.cache}", args.cache)):
+                # Cada modo parte de uma cópia do mesmo banco
+                copia = os.path.join(pasta, f"{cache}.db")
+                shutil.copy(arquivo, copia)
+                fila = contexto.Queue()
+                processo = contexto.Process(target=rodar, args=(copia, usuarios, cache, fila))
+                processo.start()
+                r = fila.get()
+                processo.join()
+                colunas = [f"{r[nome][0]:.0f}/{r[nome][1]:.0f}µs" for nome in ("saldo", "extrato", "lancar")]
+                print(f"{usuarios:>9} {rotulo:<14} {r['carga']:>6.1f}s {r['memoria'] / 2 ** 20:>7.0f}MB "
+                      f"{colunas[0]:>15} {colunas[1]:>17} {colunas[2]:>16} {'/'.join(map(str, r['hidratacoes'])):>19} {r['leitura']:>7.2f}s "
+                      f"{r['residentes']:>10}  "
+                      + "/".join(map(str, r["contadores"])))
+        finally:
+            shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    principal()
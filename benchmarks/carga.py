@@ -0,0 +1,276 @@
+# Teste de carga offline: chama os callbacks reais dos comandos do bot.py
+# com contextos, membros e interações falsos, contra um armazenamento
+# temporário. Mede latência (p50/p95/p99), vazão e bytes gravados.
+#
+#   python benchmarks/carga.py --operacoes 2000 --concorrencia 50
+#   python benchmarks/carga.py --armazenamento sqlite --limite-p99 50
+#
+# Com --limite-p99 (ms) o processo sai com código 1 se algum cenário
+# passar do limite, para servir de barreira de regressão.
+import argparse
+import asyncio
+import functools
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as banguela
+from armazenamento import criar_armazenamento
+from livro_caixa import LivroCaixa
+from livro_rpc import LivroLocal
+from modelo import centavos
+from servicos import Servicos
+
+SALDO_INICIAL = centavos(1_000_000)
+_ids = itertools.count(10_000)
+
+
+# === Discord falso ===
+class Avatar:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class Membro:
+    bot = False
+    display_avatar = Avatar()
+
+    def __init__(self):
+        self.id = next(_ids)
+        self.name = f"usuario{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        return Mensagem(None)
+
+
+class Mensagem:
+    def __init__(self, canal, view=None):
+        self.id = next(_ids)
+        self.channel = canal
+        self.view = view
+
+    async def edit(self, **kwargs):
+        if "view" in kwargs:
+            self.view = kwargs["view"]
+        return self
+
+
+class Canal:
+    def __init__(self):
+        self.id = next(_ids)
+        self.mensagens = 0
+
+    async def send(self, *args, view=None, **kwargs):
+        self.mensagens += 1
+        return Mensagem(self, view)
+
+    async def set_permissions(self, *args, **kwargs):
+        pass
+
+
+class Guilda:
+    def __init__(self):
+        self.id = next(_ids)
+        self.name = "Servidor de testes"
+        self.default_role = object()
+
+
+class Contexto:
+    def __init__(self, autor, canal, guilda):
+        self.author = autor
+        self.channel = canal
+        self.guild = guilda
+        self.ultima = None
+
+    async def send(self, *args, **kwargs):
+        self.ultima = await self.channel.send(*args, **kwargs)
+        return self.ultima
+
+    reply = send
+
+
+class Resposta:
+    def __init__(self, interacao):
+        self.interacao = interacao
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+    async def edit_message(self, **kwargs):
+        await self.interacao.message.edit(**kwargs)
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+
+class Followup:
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class Interacao:
+    type = discord.InteractionType.component
+
+    def __init__(self, usuario, mensagem, custom_id, guild_id=None):
+        self.user = usuario
+        self.guild_id = guild_id
+        self.message = mensagem
+        self.channel = mensagem.channel
+        self.response = Resposta(self)
+        self.followup = Followup()
+        self.data = {"custom_id": custom_id}
+
+
+def comando(nome):
+    cmd = banguela.bot.get_command(nome)
+    return functools.partial(cmd.callback, cmd.cog)
+
+
+async def clicar(mensagem, usuario, botao=0, admissao=None, guilda=None):
+    # Clique num componente, entregue pelo mesmo roteador do on_interaction
+    custom_id = mensagem.view.children[botao].custom_id
+    interacao = Interacao(usuario, mensagem, custom_id, guilda.id if guilda else None)
+    await banguela.bot.servicos.roteador.despachar(interacao, admissao)
+
+
+def novo_membro(saldo=SALDO_INICIAL):
+    membro = Membro()
+    if saldo:
+        banguela.bot.servicos.livro.livro.alterar_saldo(membro.id, saldo)
+    return membro
+
+
+# === Cenários ===
+async def cenario_saldo(canal, guilda):
+    await comando("saldo")(Contexto(novo_membro(), canal, guilda))
+
+
+async def cenario_work(canal, guilda):
+    await comando("work")(Contexto(novo_membro(0), canal, guilda))
+
+
+async def cenario_daily(canal, guilda):
+    await comando("daily")(Contexto(novo_membro(0), canal, guilda))
+
+
+async def cenario_duelar(canal, guilda):
+    autor, desafiado = novo_membro(), novo_membro()
+    ctx = Contexto(autor, canal, guilda)
+    await comando("duelar")(ctx, desafiado, "1k")
+    await clicar(ctx.ultima, desafiado)
+
+
+async def cenario_rinha(canal, guilda, jogadores=8):
+    ctx = Contexto(novo_membro(), canal, guilda)
+    await comando("rinha")(ctx, "500", jogadores)
+    mensagem = ctx.ultima
+    for _ in range(jogadores):
+        await clicar(mensagem, novo_membro())
+
+
+async def cenario_copo(canal, guilda):
+    ctx = Contexto(novo_membro(), canal, guilda)
+    await comando("copo")(ctx, "100")
+    await clicar(ctx.ultima, ctx.author, random.randrange(3))
+
+
+async def cenario_bet(canal, guilda):
+    autor, desafiado = novo_membro(), novo_membro()
+    ctx = Contexto(autor, canal, guilda)
+    await comando("bet")(ctx, desafiado, 100)
+    await clicar(ctx.ultima, desafiado)
+
+
+CENARIOS = {
+    "saldo": cenario_saldo,
+    "work": cenario_work,
+    "daily": cenario_daily,
+    "duelar": cenario_duelar,
+    "rinha": cenario_rinha,
+    "copo": cenario_copo,
+    "bet": cenario_bet,
+}
+
+
+# === Medição ===
+def bytes_escritos():
+    # wchar do /proc conta tudo o que o processo escreveu (Linux)
+    try:
+        with open("/proc/self/io") as f:
+            for linha in f:
+                if linha.startswith("wchar:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentil(amostras, p):
+    ordenadas = sorted(amostras)
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))]
+
+
+async def rodar(cenario, operacoes, concorrencia):
+    canal, guilda = Canal(), Guilda()
+    semaforo = asyncio.Semaphore(concorrencia)
+    latencias = []
+
+    async def uma():
+        async with semaforo:
+            inicio = time.perf_counter()
+            await cenario(canal, guilda)
+            latencias.append(time.perf_counter() - inicio)
+
+    escrito = bytes_escritos()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uma() for _ in range(operacoes)))
+    await banguela.bot.servicos.livro.confirmar()
+    duracao = time.perf_counter() - inicio
+    if escrito is not None:
+        escrito = bytes_escritos() - escrito
+    return latencias, duracao, escrito
+
+
+async def principal(args):
+    pasta = tempfile.mkdtemp(prefix="banguela-carga-")
+    livro = LivroCaixa(criar_armazenamento(
+        args.armazenamento, os.path.join(pasta, "financas.json"), os.path.join(pasta, "financas.db")))
+    banguela.bot.servicos = Servicos(LivroLocal(livro))
+    await banguela.bot.servicos.livro.abrir()
+    for nome in banguela.COGS:
+        await banguela.bot.load_extension(f"cogs.{nome}")
+
+    estourou = False
+    print(f"armazenamento={args.armazenamento} operações={args.operacoes} concorrência={args.concorrencia}")
+    print(f"{'cenário':<8} {'p50':>9} {'p95':>9} {'p99':>9} {'ops/s':>9} {'bytes':>12}")
+    for nome in args.cenarios:
+        latencias, duracao, escrito = await rodar(CENARIOS[nome], args.operacoes, args.concorrencia)
+        p50, p95, p99 = (percentil(latencias, p) * 1000 for p in (0.50, 0.95, 0.99))
+        bytes_texto = "?" if escrito is None else str(escrito)
+        print(f"{nome:<8} {p50:>7.2f}ms {p95:>7.2f}ms {p99:>7.2f}ms {args.operacoes / duracao:>9.0f} {bytes_texto:>12}")
+        if args.limite_p99 is not None and p99 > args.limite_p99:
+            estourou = True
+
+    await banguela.bot.servicos.livro.fechar()
+    return 1 if estourou else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga offline do Banguela")
+    parser.add_argument("--armazenamento", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--operacoes", type=int, default=1000)
+    parser.add_argument("--concorrencia", type=int, default=50)
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--limite-p99", type=float, default=None, help="p99 máximo em ms")
+    sys.exit(asyncio.run(principal(parser.parse_args())))
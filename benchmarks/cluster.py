@@ -0,0 +1,274 @@
+# Simulação do modo cluster: um processo com o livro caixa (o mesmo
+# servir_livro do "python bot.py livro") e vários processos de shard
+# falsos que disparam duelos, rinhas, dailies e lançamentos ao mesmo tempo
+# pelo socket local. No fim confere que nenhum dinheiro surgiu ou sumiu,
+# que a oferta agregada bate com os saldos, que nenhum saldo ficou
+# negativo, que nenhuma reserva vazou, que cada daily foi pago uma vez só
+# e que o que está no disco bate com a memória. Depois derruba o livro:
+# um livro travado (SIGSTOP) tem de estourar o tempo da chamada, um livro
+# parado tem de dar ConnectionError na hora, e o shard tem de voltar
+# sozinho quando o livro sobe de novo.
+#
+#   python benchmarks/cluster.py --processos 4 --operacoes 2000
+#
+# Sai com código 1 se alguma conferência falhar.
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazenamento import criar_armazenamento
+from livro_caixa import LivroCaixa, SaldoInsuficiente
+from livro_rpc import LivroRemoto, servir_livro
+from modelo import centavos
+
+SALDO_INICIAL = centavos(1_000)
+# Tempo de chamada curto para a conferência do livro travado
+TEMPO_CHAMADA_QUEDA = 1.0
+APOSTA = centavos(100)
+CONCORRENCIA = 20
+
+
+def abrir_livro(args):
+    return LivroCaixa(criar_armazenamento(args.armazenamento, os.path.join(args.pasta, "financas.json"),
+                                          os.path.join(args.pasta, "financas.db")), limite_cache=args.cache)
+
+
+def rodar_livro(args):
+    asyncio.run(servir_livro(abrir_livro(args), args.endereco))
+
+
+# === Shard falso ===
+async def duelo(livro, usuarios, resultado):
+    autor, membro = random.sample(usuarios, 2)
+    try:
+        reserva_autor = await livro.reservar(autor, APOSTA)
+    except SaldoInsuficiente:
+        return
+    try:
+        reserva_membro = await livro.reservar(membro, APOSTA)
+    except SaldoInsuficiente:
+        return await livro.liberar(reserva_autor)
+    vencedor, perdedor = random.sample([autor, membro], 2)
+    await livro.liquidar([reserva_autor, reserva_membro], [
+        (perdedor, -APOSTA, "Perdeu duelo"), (vencedor, APOSTA, "Ganhou duelo")])
+
+
+async def rinha(livro, usuarios, resultado):
+    jogadores, reservas = [], []
+    for uid in random.sample(usuarios, 4):
+        try:
+            reservas.append(await livro.reservar(uid, APOSTA))
+            jogadores.append(uid)
+        except SaldoInsuficiente:
+            pass
+    if len(jogadores) < 2:
+        return await livro.liberar(*reservas)
+    movimentos = [(uid, -APOSTA, "Entrou na rinha") for uid in jogadores]
+    movimentos.append((random.choice(jogadores), APOSTA * len(jogadores), "Ganhou a rinha"))
+    await livro.liquidar(reservas, movimentos)
+
+
+async def daily(livro, usuarios, resultado):
+    uid = random.choice(usuarios)
+    if not await livro.resgatar("daily", uid, centavos(500), "Recompensa diária"):
+        resultado["dailies"].append(uid)
+        resultado["criado"] += centavos(500)
+
+
+async def lancamento(livro, usuarios, resultado):
+    valor = centavos(random.randint(1, 50))
+    await livro.lancar(random.choice(usuarios), valor, "Adicionado pela simulação")
+    resultado["criado"] += valor
+
+
+async def desistencia(livro, usuarios, resultado):
+    # Jogo que expira: reserva e libera sem mexer no saldo
+    try:
+        await livro.liberar(await livro.reservar(random.choice(usuarios), APOSTA))
+    except SaldoInsuficiente:
+        pass
+
+
+OPERACOES = [duelo, duelo, rinha, daily, lancamento, desistencia]
+
+
+async def trafego(args, semente):
+    random.seed(semente)
+    livro = LivroRemoto(args.endereco)
+    await livro.abrir()
+    usuarios = [str(uid) for uid in range(args.usuarios)]
+    resultado = {"criado": 0, "dailies": [], "latencias": []}
+    semaforo = asyncio.Semaphore(CONCORRENCIA)
+
+    async def uma():
+        async with semaforo:
+            inicio = time.perf_counter()
+            await random.choice(OPERACOES)(livro, usuarios, resultado)
+            await livro.confirmar()
+            resultado["latencias"].append(time.perf_counter() - inicio)
+
+    await asyncio.gather(*(uma() for _ in range(args.operacoes)))
+    await livro.fechar()
+    return resultado
+
+
+def rodar_shard(args, semente, fila):
+    fila.put(asyncio.run(trafego(args, semente)))
+
+
+# === Conferência ===
+async def conferir(args, criado, dailies):
+    erros = []
+    if len(dailies) != len(set(dailies)):
+        erros.append(f"daily pago mais de uma vez: {len(dailies) - len(set(dailies))} vezes")
+    livro = LivroRemoto(args.endereco)
+    await livro.abrir()
+    ranking = await livro.pagina_ranking(0, await livro.total_ranking())
+    total = sum(saldo for _, saldo in ranking)
+    esperado = SALDO_INICIAL * args.usuarios + criado
+    if total != esperado:
+        erros.append(f"total {total} != esperado {esperado}")
+    oferta = (await livro.resumo_economia(0))["oferta"]
+    if oferta != total:
+        erros.append(f"oferta agregada {oferta} != total {total}")
+    negativos = [uid for uid, saldo in ranking if saldo < 0]
+    if negativos:
+        erros.append(f"saldos negativos: {negativos[:5]}")
+    # Os shards já desconectaram: nenhuma reserva pode ter sobrado
+    for uid, saldo in ranking:
+        if await livro.saldo_disponivel(uid) != saldo:
+            erros.append(f"reserva vazada para {uid}")
+            break
+    await livro.fechar()
+    return erros, total
+
+
+async def chamar_com_prazo(chamada, limite):
+    # (resultado ou exceção, segundos), sem nunca esperar mais que "limite"
+    inicio = time.perf_counter()
+    try:
+        resultado = await asyncio.wait_for(chamada, limite)
+    except Exception as erro:
+        resultado = erro
+    return resultado, time.perf_counter() - inicio
+
+
+async def conferir_queda(args, contexto, processo_livro):
+    erros = []
+    livro = LivroRemoto(args.endereco, tempo_chamada=TEMPO_CHAMADA_QUEDA)
+    await livro.abrir()
+    saldo = await livro.saldo("0")
+
+    os.kill(processo_livro.pid, signal.SIGSTOP)
+    resultado, duracao = await chamar_com_prazo(livro.saldo("0"), TEMPO_CHAMADA_QUEDA * 5)
+    if not isinstance(resultado, TimeoutError) or duracao > TEMPO_CHAMADA_QUEDA * 2:
+        erros.append(f"livro travado: esperava TimeoutError da chamada, veio {resultado!r} em {duracao:.1f}s")
+    os.kill(processo_livro.pid, signal.SIGCONT)
+
+    processo_livro.terminate()
+    await asyncio.to_thread(processo_livro.join)
+    for _ in range(2):
+        resultado, duracao = await chamar_com_prazo(livro.saldo("0"), 5)
+        if not isinstance(resultado, ConnectionError) or duracao > 0.5:
+            erros.append(f"livro parado: esperava ConnectionError na hora, veio {resultado!r} em {duracao:.1f}s")
+            break
+
+    processo_livro = contexto.Process(target=rodar_livro, args=(args,))
+    processo_livro.start()
+    limite = time.monotonic() + 10
+    while True:
+        resultado, _ = await chamar_com_prazo(livro.saldo("0"), 5)
+        if not isinstance(resultado, Exception) or time.monotonic() > limite:
+            break
+        await asyncio.sleep(0.1)
+    if resultado != saldo:
+        erros.append(f"depois de o livro voltar: esperava saldo {saldo}, veio {resultado!r}")
+    await livro.fechar()
+    return erros, processo_livro
+
+
+def principal(args):
+    args.pasta = tempfile.mkdtemp(prefix="banguela-cluster-")
+    args.endereco = args.endereco or f"unix:{os.path.join(args.pasta, 'livro.sock')}"
+    livro = abrir_livro(args)
+    livro.carregar()
+    for uid in range(args.usuarios):
+        livro.alterar_saldo(uid, SALDO_INICIAL)
+    livro.salvar(compactar=True)
+    livro.armazenamento.fechar()
+
+    contexto = multiprocessing.get_context("spawn")
+    processo_livro = contexto.Process(target=rodar_livro, args=(args,))
+    processo_livro.start()
+    limite = time.monotonic() + 10
+    while not asyncio.run(_conecta(args.endereco)):
+        if time.monotonic() > limite:
+            sys.exit("❌ O processo do livro caixa não subiu.")
+        time.sleep(0.05)
+
+    fila = contexto.Queue()
+    inicio = time.perf_counter()
+    shards = [contexto.Process(target=rodar_shard, args=(args, semente, fila)) for semente in range(args.processos)]
+    for shard in shards:
+        shard.start()
+    resultados = [fila.get() for _ in shards]
+    for shard in shards:
+        shard.join()
+    duracao = time.perf_counter() - inicio
+
+    criado = sum(r["criado"] for r in resultados)
+    dailies = [uid for r in resultados for uid in r["dailies"]]
+    latencias = sorted(latencia for r in resultados for latencia in r["latencias"])
+    erros, total = asyncio.run(conferir(args, criado, dailies))
+    erros_queda, processo_livro = asyncio.run(conferir_queda(args, contexto, processo_livro))
+    erros += erros_queda
+
+    processo_livro.terminate()
+    processo_livro.join()
+    # O que foi gravado no disco tem de bater com o que estava em memória
+    livro = abrir_livro(args)
+    livro.carregar()
+    em_disco = sum(livro.usuarios.saldos.values())
+    livro.armazenamento.fechar()
+    if em_disco != total:
+        erros.append(f"total no disco {em_disco} != total em memória {total}")
+
+    operacoes = args.operacoes * args.processos
+    p50, p99 = (latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000 for p in (0.50, 0.99))
+    print(f"processos={args.processos} usuários={args.usuarios} operações={operacoes} endereço={args.endereco}")
+    print(f"{operacoes / duracao:.0f} ops/s, p50 {p50:.2f}ms, p99 {p99:.2f}ms, {len(dailies)} dailies pagos")
+    for erro in erros:
+        print(f"❌ {erro}")
+    if not erros:
+        print("✅ Totais conservados, sem saldos negativos nem reservas vazadas, dailies únicos; "
+              "quedas do livro falham rápido e o shard reconecta")
+    return 1 if erros else 0
+
+
+async def _conecta(endereco):
+    try:
+        livro = LivroRemoto(endereco)
+        await livro.abrir()
+        await livro.fechar()
+        return True
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulação do modo cluster do Banguela")
+    parser.add_argument("--armazenamento", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--operacoes", type=int, default=1000, help="operações por processo")
+    parser.add_argument("--usuarios", type=int, default=200)
+    parser.add_argument("--cache", type=int, default=None, help="usuários hidratados em memória (só sqlite)")
+    parser.add_argument("--endereco", default=None, help="padrão: socket unix numa pasta temporária")
+    sys.exit(principal(parser.parse_args()))
@@ -0,0 +1,113 @@
+# Confirmações pendentes: o kickar antigo (uma tarefa por prompt esperando
+# em bot.wait_for("interaction", check=...)) contra o roteador atual (rota
+# no custom_id, motivo em "estados"). Abre N prompts de kick sem resposta e
+# mede o custo de despachar cliques no meio deles, e quantas tarefas e
+# timers ficam vivos esperando.
+#   python benchmarks/componentes.py
+#   python benchmarks/componentes.py --pendentes 100 1000 10000 50000
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import discord
+from discord.ui import Button, View
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga import Canal, Contexto, Guilda, Interacao, Membro, banguela, comando, percentil
+from armazenamento import criar_armazenamento
+from livro_caixa import LivroCaixa
+from livro_rpc import LivroLocal
+from servicos import Servicos
+
+
+async def kickar_antigo(ctx, membro, motivo="Não informado"):
+    # O kickar de antes, sem a expulsão (o benchmark só cancela)
+    view = View()
+    view.add_item(Button(label="Confirmar", style=discord.ButtonStyle.danger, custom_id="confirma_kick"))
+    view.add_item(Button(label="Cancelar", style=discord.ButtonStyle.secondary, custom_id="cancelar_kick"))
+    msg = await ctx.send(f"Deseja realmente **expulsar {membro}**?", view=view)
+
+    async def wait_buttons():
+        try:
+            interaction = await banguela.bot.wait_for(
+                "interaction",
+                check=lambda i: i.user == ctx.author and i.message.id == msg.id,
+                timeout=30
+            )
+        except asyncio.TimeoutError:
+            return
+        await interaction.response.edit_message(content="❌ Ação cancelada.", view=None)
+
+    banguela.bot.loop.create_task(wait_buttons())
+    return msg
+
+
+async def rodada(args, pendentes, antigo):
+    canal, guilda = Canal(), Guilda()
+    tarefas_antes = len(asyncio.all_tasks())
+    prompts = []
+    for _ in range(pendentes):
+        ctx = Contexto(Membro(), canal, guilda)
+        if antigo:
+            await kickar_antigo(ctx, Membro())
+        else:
+            await comando("kickar")(ctx, Membro())
+        prompts.append((ctx.author, ctx.ultima))
+    await asyncio.sleep(0)
+    tarefas = len(asyncio.all_tasks()) - tarefas_antes
+    timers = len(banguela.bot.loop._scheduled)
+
+    # Cliques de outros componentes (um bcopo, um extrato...) também passam
+    # por todos os checks pendentes no modelo antigo
+    latencias = []
+    for _ in range(args.cliques):
+        autor, mensagem = random.choice(prompts)
+        interacao = Interacao(Membro(), mensagem, mensagem.view.children[1].custom_id)
+        inicio = time.perf_counter()
+        if antigo:
+            banguela.bot.dispatch("interaction", interacao)
+        else:
+            await banguela.bot.servicos.roteador.despachar(interacao)
+        latencias.append(time.perf_counter() - inicio)
+
+    # Cancela todos, para a próxima rodada partir do zero
+    for autor, mensagem in prompts:
+        interacao = Interacao(autor, mensagem, mensagem.view.children[1].custom_id)
+        if antigo:
+            banguela.bot.dispatch("interaction", interacao)
+        else:
+            await banguela.bot.servicos.roteador.despachar(interacao)
+    await asyncio.sleep(0.01)
+    return latencias, tarefas, timers
+
+
+async def principal(args):
+    pasta = tempfile.mkdtemp(prefix="banguela-componentes-")
+    livro = LivroCaixa(criar_armazenamento("json", os.path.join(pasta, "financas.json"), os.path.join(pasta, "financas.db")))
+    banguela.bot.servicos = Servicos(LivroLocal(livro))
+    await banguela.bot._async_setup_hook()
+    await banguela.bot.servicos.livro.abrir()
+    for nome in banguela.COGS:
+        await banguela.bot.load_extension(f"cogs.{nome}")
+
+    print(f"{'pendentes':>9} {'modo':<9} {'clique p50':>11} {'clique p99':>11} {'tarefas':>8} {'timers':>7}")
+    for pendentes in args.pendentes:
+        for antigo in (True, False):
+            latencias, tarefas, timers = await rodada(args, pendentes, antigo)
+            p50, p99 = (percentil(latencias, p) * 1e6 for p in (0.50, 0.99))
+            print(f"{pendentes:>9} {'wait_for' if antigo else 'roteador':<9} {p50:>9.1f}µs {p99:>9.1f}µs "
+                  f"{tarefas:>8} {timers:>7}")
+
+    await banguela.bot.servicos.livro.fechar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Despacho de cliques com confirmações pendentes")
+    parser.add_argument("--pendentes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--cliques", type=int, default=1000)
+    asyncio.run(principal(parser.parse_args()))
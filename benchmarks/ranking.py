@@ -0,0 +1,42 @@
+# Latência do ranking (btop) de 1 mil a 1 milhão de usuários.
+#   python benchmarks/ranking.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import Ranking
+
+OPERACOES = 20_000
+
+
+def medir(usuarios):
+    ranking = Ranking()
+    ranking.reconstruir({str(i): random.randint(0, 1_000_000) for i in range(usuarios)})
+    uids = [str(random.randrange(usuarios)) for _ in range(OPERACOES)]
+
+    inicio = time.perf_counter()
+    for uid in uids:
+        ranking.atualizar(uid, random.randint(0, 1_000_000))
+    atualizar = (time.perf_counter() - inicio) / OPERACOES
+
+    inicio = time.perf_counter()
+    for uid in uids:
+        ranking.posicao(uid)
+    posicao = (time.perf_counter() - inicio) / OPERACOES
+
+    inicio = time.perf_counter()
+    for _ in range(OPERACOES):
+        ranking.pagina(random.randrange(max(1, usuarios - 10)), 10)
+    pagina = (time.perf_counter() - inicio) / OPERACOES
+
+    return atualizar, posicao, pagina
+
+
+if __name__ == "__main__":
+    print(f"{'usuários':>10} {'atualizar':>12} {'posição':>12} {'página':>12}")
+    for usuarios in (1_000, 10_000, 100_000, 1_000_000):
+        atualizar, posicao, pagina = medir(usuarios)
+        print(f"{usuarios:>10} {atualizar * 1e6:>10.2f}µs {posicao * 1e6:>10.2f}µs {pagina * 1e6:>10.2f}µs")
@@ -0,0 +1,104 @@
+# Snapshot do armazenamento JSON: documento único do formato antigo
+# (json.dump com indent=2) contra os segmentos, de 10 mil a 1 milhão de
+# usuários. Mede gravação completa, compactação incremental (só
+# ALTERADOS usuários mudaram), carregamento e tamanho em disco.
+#   python benchmarks/snapshot.py
+#   python benchmarks/snapshot.py --usuarios 10000 100000 --gzip
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from armazenamento import ArmazenamentoJSON, dados_vazios, ler_json
+
+ALTERADOS = 1000
+DESCRICOES = ["Recompensa diária", "Salário do trabalho", "Acertou o copo", "Entrou na rinha"]
+
+
+def gerar(usuarios, transacoes):
+    dados = dados_vazios()
+    for i in range(usuarios):
+        dados["usuarios"][str(10 ** 17 + i)] = {
+            "saldo": random.randint(0, 100_000) / 100,
+            "transacoes": [{"tipo": "receita", "valor": random.randint(1, 500), "descricao": random.choice(DESCRICOES),
+                            "data": "2025-06-06 18:51:52"} for _ in range(transacoes)],
+        }
+    return dados
+
+
+def tamanho(caminho):
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    return sum(os.path.getsize(os.path.join(caminho, nome)) for nome in os.listdir(caminho))
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def documento(dados, arquivo):
+    with open(arquivo, "w") as f:
+        json.dump(dados, f, indent=2)
+
+
+def segmentos(armazenamento, dados):
+    armazenamento.compactar(armazenamento.instantaneo(dados))
+
+
+def medir(usuarios, transacoes, comprimir):
+    pasta = tempfile.mkdtemp(prefix="banguela-snapshot-")
+    antigo = os.path.join(pasta, "antigo.json")
+    arquivo = os.path.join(pasta, "financas.json")
+    try:
+        dados = gerar(usuarios, transacoes)
+        linhas = []
+
+        salvar, _ = cronometrar(documento, dados, antigo)
+        carregar, _ = cronometrar(ler_json, antigo)
+        linhas.append(("documento indent=2", salvar, None, carregar, tamanho(antigo)))
+
+        armazenamento = ArmazenamentoJSON(arquivo, comprimir=comprimir)
+        armazenamento.carregar()
+        salvar, _ = cronometrar(segmentos, armazenamento, dados)
+        alterados = random.sample(list(dados["usuarios"]), min(ALTERADOS, usuarios))
+        for uid in alterados:
+            dados["usuarios"][uid]["saldo"] += 1
+        parcial = {**dados, "usuarios": {uid: dados["usuarios"][uid] for uid in alterados}}
+        incremental, _ = cronometrar(segmentos, armazenamento, parcial)
+        armazenamento.fechar()
+        del dados, parcial
+
+        leitor = ArmazenamentoJSON(arquivo)
+        carregar, _ = cronometrar(leitor.carregar)
+        leitor.fechar()
+        rotulo = "segmentos gzip" if comprimir else "segmentos"
+        linhas.append((rotulo, salvar, incremental, carregar, tamanho(arquivo + ".segmentos")))
+        return linhas
+    finally:
+        shutil.rmtree(pasta)
+
+
+def principal():
+    parser = argparse.ArgumentParser(description="Gravação e carga do snapshot JSON")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--transacoes", type=int, default=3, help="transações na janela quente de cada usuário")
+    parser.add_argument("--gzip", action="store_true", help="segmentos comprimidos")
+    args = parser.parse_args()
+    print(f"{'usuários':>9} {'formato':<20} {'gravar':>9} {f'{ALTERADOS} alterados':>15} {'carregar':>9} {'disco':>10}")
+    for usuarios in args.usuarios:
+        for formato, salvar, incremental, carregar, bytes_ in medir(usuarios, args.transacoes, args.gzip):
+            incremental = "-" if incremental is None else f"{incremental * 1000:.0f}ms"
+            print(f"{usuarios:>9} {formato:<20} {salvar * 1000:>7.0f}ms {incremental:>15} "
+                  f"{carregar * 1000:>7.0f}ms {bytes_ / 2 ** 20:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    principal()
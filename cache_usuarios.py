@@ -0,0 +1,142 @@
+from collections import OrderedDict
+
+from metricas import metricas
+from modelo import Usuario
+
+# Estimativa do que um Usuario residente ocupa (bytes): o objeto com as
+# quatro colunas vazias, mais 8 + 8 + 1 + 4 por transação da janela quente
+BYTES_USUARIO = 400
+BYTES_TRANSACAO = 21
+
+
+# === Cache de usuários ===
+# Os saldos de todos os usuários ficam sempre em memória (uid -> centavos):
+# ranking, oferta e saldo/bal só precisam deles. O Usuario completo, com a
+# janela quente do histórico, é hidratado do armazenamento no primeiro
+# acesso e fica num LRU limitado por quantidade e por bytes estimados.
+# Usuários com operações ainda não gravadas ficam fixados até o lote deles
+# chegar ao disco; só os limpos são despejados.
+# Sem "hidratar" (armazenamento JSON, que não lê um usuário sozinho) nada
+# é despejado e todos ficam residentes, como antes.
+# O livro caixa lê os que "faltando" aponta na thread de E/S e entrega por
+# "hidratado" antes de usá-los; "hidratar" (síncrono) é só o plano B, para
+# um usuário despejado entre a leitura e o uso.
+class CacheUsuarios:
+    def __init__(self, hidratar=None, limite=None, limite_bytes=None):
+        self.hidratar = hidratar
+        self.limite = limite
+        self.limite_bytes = limite_bytes
+        self.saldos = {}
+        self.fixados = set()
+        self.bytes = 0
+        self._residentes = OrderedDict()
+        self._tamanhos = {}
+
+    @property
+    def preguicoso(self):
+        return self.hidratar is not None
+
+    def __len__(self):
+        return len(self.saldos)
+
+    def __contains__(self, uid):
+        return uid in self.saldos
+
+    def __iter__(self):
+        return iter(self.saldos)
+
+    @property
+    def residentes(self):
+        return len(self._residentes)
+
+    def carregar(self, usuarios):
+        # Carga completa: {uid: Usuario}, todos residentes
+        for uid, usuario in usuarios.items():
+            self.saldos[uid] = usuario.saldo
+            self._guardar(uid, usuario)
+
+    def saldo(self, uid):
+        return self.saldos.get(uid, 0)
+
+    def definir_saldo(self, uid, saldo):
+        self.saldos[uid] = saldo
+        usuario = self._residentes.get(uid)
+        if usuario is not None:
+            usuario.saldo = saldo
+
+    def obter(self, uid, criar=False):
+        usuario = self._residentes.get(uid)
+        if usuario is not None:
+            self._residentes.move_to_end(uid)
+            metricas.contar("cache_usuarios_acertos")
+            return usuario
+        if uid in self.saldos and self.preguicoso:
+            metricas.contar("cache_usuarios_faltas")
+            metricas.contar("cache_usuarios_hidratacoes", via="loop")
+            usuario = self.hidratar(uid)
+        return self._admitir(uid, usuario, criar)
+
+    def faltando(self, uids):
+        # Usuários conhecidos que teriam de ser lidos do armazenamento
+        if not self.preguicoso:
+            return []
+        return [uid for uid in dict.fromkeys(uids) if uid in self.saldos and uid not in self._residentes]
+
+    def hidratado(self, uid, usuario):
+        # Usuário lido fora do loop; se alguém já o trouxe (e talvez já o
+        # alterou) nesse meio tempo, vale o que está em memória
+        if uid in self._residentes or uid not in self.saldos:
+            return
+        metricas.contar("cache_usuarios_faltas")
+        metricas.contar("cache_usuarios_hidratacoes", via="executor")
+        self._admitir(uid, usuario, False)
+
+    def _admitir(self, uid, usuario, criar):
+        if usuario is None:
+            if uid not in self.saldos and not criar:
+                return None
+            usuario = Usuario()
+        # O saldo em memória vale mais que o do disco: pode haver uma
+        # mudança de saldo ainda não gravada
+        usuario.saldo = self.saldos.setdefault(uid, 0)
+        self._guardar(uid, usuario)
+        self._podar(manter=uid)
+        return usuario
+
+    def fixar(self, uid):
+        # Chamado a cada operação registrada do usuário; aproveita para
+        # atualizar o tamanho (a janela quente cresce e encolhe)
+        self.fixados.add(uid)
+        usuario = self._residentes.get(uid)
+        if usuario is not None:
+            self.bytes -= self._tamanhos[uid]
+            self._tamanhos[uid] = BYTES_USUARIO + len(usuario.transacoes) * BYTES_TRANSACAO
+            self.bytes += self._tamanhos[uid]
+
+    def soltar(self, uids):
+        self.fixados.difference_update(uids)
+        self._podar()
+
+    def _guardar(self, uid, usuario):
+        self._residentes[uid] = usuario
+        self._tamanhos[uid] = BYTES_USUARIO + len(usuario.transacoes) * BYTES_TRANSACAO
+        self.bytes += self._tamanhos[uid]
+
+    def _excedido(self):
+        return ((self.limite is not None and len(self._residentes) > self.limite)
+                or (self.limite_bytes is not None and self.bytes > self.limite_bytes))
+
+    def _podar(self, manter=None):
+        # "manter": o usuário que acabou de ser entregue a quem chamou
+        if not self.preguicoso:
+            return
+        while self._excedido():
+            # Do menos usado para o mais usado, pulando os fixados
+            for uid in self._residentes:
+                if uid not in self.fixados and uid != manter:
+                    break
+            else:
+                return
+            del self._residentes[uid]
+            self.bytes -= self._tamanhos.pop(uid)
+            metricas.contar("cache_usuarios_despejos")
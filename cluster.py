@@ -0,0 +1,89 @@
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+# === Modo cluster ===
+# Um processo só com o livro caixa e N processos do bot, cada um com uma
+# parte dos shards, todos falando com o livro pelo mesmo socket local.
+#   python cluster.py --processos 2 --shards 4
+ENDERECO = "unix:/tmp/banguela-livro.sock"
+# Cada processo do bot expõe métricas na porta METRICAS_PORTA + índice
+METRICAS_PORTA = int(os.getenv("BANGUELA_METRICAS_PORTA", "9108"))
+ESPERA_LIVRO = 30.0
+
+
+def livro_pronto(endereco):
+    if endereco.startswith("unix:"):
+        conexao = socket.socket(socket.AF_UNIX)
+        alvo = endereco[5:]
+    else:
+        conexao = socket.socket()
+        host, porta = endereco.rsplit(":", 1)
+        alvo = (host, int(porta))
+    try:
+        conexao.connect(alvo)
+        return True
+    except OSError:
+        return False
+    finally:
+        conexao.close()
+
+
+def dividir_shards(total, processos):
+    return [list(range(total))[i::processos] for i in range(processos)]
+
+
+def principal():
+    parser = argparse.ArgumentParser(description="Sobe o livro caixa e os processos de shards do Banguela")
+    parser.add_argument("--processos", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=None, help="total de shards (padrão: um por processo)")
+    parser.add_argument("--endereco", default=ENDERECO, help="unix:/caminho.sock ou 127.0.0.1:porta")
+    args = parser.parse_args()
+    total_shards = args.shards or args.processos
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    bot_py = os.path.join(pasta, "bot.py")
+
+    livro = subprocess.Popen([sys.executable, bot_py, "livro", args.endereco], cwd=pasta)
+    limite = time.monotonic() + ESPERA_LIVRO
+    while not livro_pronto(args.endereco):
+        if livro.poll() is not None or time.monotonic() > limite:
+            sys.exit("❌ O processo do livro caixa não subiu.")
+        time.sleep(0.1)
+
+    processos = []
+    for indice, shards in enumerate(dividir_shards(total_shards, args.processos)):
+        ambiente = {**os.environ,
+                    "BANGUELA_LIVRO": args.endereco,
+                    "BANGUELA_SHARDS": ",".join(map(str, shards)),
+                    "BANGUELA_TOTAL_SHARDS": str(total_shards),
+                    "BANGUELA_METRICAS_PORTA": str(METRICAS_PORTA + indice if METRICAS_PORTA else 0)}
+        processos.append(subprocess.Popen([sys.executable, bot_py], cwd=pasta, env=ambiente))
+        print(f"🚀 Processo {indice}: shards {shards}")
+
+    def parar(*_):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, parar)
+    try:
+        while all(processo.poll() is None for processo in processos + [livro]):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Os shards saem primeiro; o livro por último, gravando o que faltar
+        for processo in processos:
+            if processo.poll() is None:
+                processo.terminate()
+        for processo in processos:
+            processo.wait()
+        if livro.poll() is None:
+            livro.terminate()
+        livro.wait()
+
+
+if __name__ == "__main__":
+    principal()
@@ -0,0 +1,59 @@
+import discord
+from discord import SelectOption, ui
+from discord.ext import commands
+
+from componentes import componentes, rota
+from servicos import CogBanguela
+
+
+class Ajuda(CogBanguela):
+    def menu_ajuda(self):
+        options = [
+            SelectOption(label="Administração", description="Comandos de moderação", emoji="🛠️", value="admin"),
+            SelectOption(label="Economia", description="Comandos de dinheiro", emoji="💰", value="eco"),
+            SelectOption(label="Diversão", description="Comandos divertidos", emoji="🎉", value="fun"),
+        ]
+        return componentes(ui.Select(placeholder="Selecione uma categoria...", options=options,
+                                     custom_id=self.roteador.custom_id("ajuda")))
+
+    @commands.command(name="bajuda")
+    async def bajuda(self, ctx):
+        embed = discord.Embed(title="📘 Menu de Ajuda", description="Escolha uma categoria no menu abaixo.", color=0x2b2d31)
+        await ctx.send(embed=embed, view=self.menu_ajuda())
+
+    @rota("ajuda")
+    async def escolher_ajuda(self, interaction):
+        categoria = interaction.data["values"][0]
+        if categoria == "admin":
+            embed = discord.Embed(title="🛠️ Comandos de Administração", color=0x2b2d31)
+            embed.add_field(name="`lock`", value="Trava um canal", inline=False)
+            embed.add_field(name="`unlock`", value="Destrava um canal", inline=False)
+            embed.add_field(name="`ban`", value="Bane um membro com confirmação", inline=False)
+            embed.add_field(name="`unban`", value="Desbane um membro por ID", inline=False)
+            embed.add_field(name="`mute`", value="Silencia um membro", inline=False)
+            embed.add_field(name="`kickar`", value="Expulsa um membro com confirmação", inline=False)
+            embed.add_field(name="`aviso`", value="Avisa um membro", inline=False)
+            embed.add_field(name="`badicionar` / `bremover` <alvos> <valor>", value="Credita ou debita usuários, cargos (com o intent de membros) ou uma lista de IDs anexada, tudo de uma vez", inline=False)
+            embed.add_field(name="`beconomia`", value="Dinheiro em circulação e entradas/saídas por categoria e por dia", inline=False)
+            embed.add_field(name="`bstats`", value="Latência dos comandos e E/S do armazenamento", inline=False)
+            embed.add_field(name="`brecarregar [módulo]`", value="Recarrega módulos sem desconectar (dono do bot)", inline=False)
+
+        elif categoria == "eco":
+            embed = discord.Embed(title="💰 Comandos de Economia", color=0x2b2d31)
+            embed.add_field(name="`bdaily`", value="Coleta diária", inline=False)
+            embed.add_field(name="`bwork`", value="Trabalhar e ganhar dinheiro", inline=False)
+            embed.add_field(name="`batm` / `bbal`", value="Consulta seu saldo", inline=False)
+            embed.add_field(name="`bextrato [@usuário]`", value="Histórico de transações", inline=False)
+            embed.add_field(name="`btop [página]`", value="Ranking dos mais ricos", inline=False)
+            embed.add_field(name="`bcopo <valor>`", value="Jogo de adivinhar o copo", inline=False)
+            embed.add_field(name="`brinha <valor> <jogadores>`", value="Inicia uma rinha de emojis", inline=False)
+
+        elif categoria == "fun":
+            embed = discord.Embed(title="🎉 Comandos de Diversão", color=0x2b2d31)
+            embed.add_field(name="(em breve)", value="Mais comandos virão aqui!", inline=False)
+
+        await interaction.response.edit_message(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Ajuda(bot))
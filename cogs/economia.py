@@ -0,0 +1,362 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+import discord
+from discord.ext import commands
+from discord.ui import Button
+
+from componentes import componentes, rota
+from livro_caixa import SaldoInsuficiente
+from modelo import centavos, formatar, parse_valor
+from servicos import CogBanguela
+
+# Avisa por DM quando o VIP vence
+AVISAR_VIP_EXPIRADO = True
+POR_PAGINA_TOP = 10
+POR_PAGINA_EXTRATO = 10
+# badicionar/bremover com pelo menos isso de usuários mostram o andamento
+LOTE_COM_PROGRESSO = 200
+# IDs de usuário soltos no texto (ou num anexo) do badicionar/bremover.
+# Antes de procurar, saem menções de cargo e de canal, emojis
+# personalizados (<:nome:id>) e links (ex.: link de mensagem), cujos
+# números não são usuários.
+ID_USUARIO = re.compile(r"\d{15,20}")
+NAO_USUARIOS = re.compile(r"<(?:@&|#)\d+>|<a?:\w+:\d+>|https?://\S+")
+# Dias mostrados no beconomia
+DIAS_ECONOMIA = 7
+
+
+def embed_cooldown(usuario, restante):
+    tempo = str(timedelta(seconds=restante))
+    return discord.Embed(
+        title="⏳ Aguarde um pouco!",
+        description=f"{usuario.mention}, você poderá usar este comando novamente em **{tempo}**.",
+        color=0xffcc00
+    )
+
+
+class Economia(CogBanguela):
+    async def cog_load(self):
+        await super().cog_load()
+        if AVISAR_VIP_EXPIRADO:
+            self.livro.ao_expirar_vip = self.avisar_vip_expirado
+
+    async def cog_unload(self):
+        await super().cog_unload()
+        self.livro.ao_expirar_vip = None
+
+    async def avisar_vip_expirado(self, uid, vip):
+        usuario = await self.bot.fetch_user(int(uid))
+        try:
+            await usuario.send("💎 Seu VIP expirou! Fale com a staff para renovar.")
+        except discord.HTTPException:
+            pass
+
+    # === Saldo ===
+    @commands.command()
+    async def saldo(self, ctx):
+        saldo = await self.servicos.saldo(ctx.author.id)
+        await ctx.send(f"💰 {ctx.author.mention}, seu saldo é {formatar(saldo)}")
+
+    @commands.command(name="atm")
+    async def atm(self, ctx):
+        saldo = await self.servicos.saldo(ctx.author.id)
+        emoji_vip = await self.livro.emoji_vip(ctx.author.id) or "💰"
+
+        embed = discord.Embed(
+            title=f"{emoji_vip} Carteira de {ctx.author.name}",
+            description=f"Saldo atual: **{formatar(saldo)}**",
+            color=0x3498db
+        )
+        embed.set_thumbnail(url=ctx.author.display_avatar.url)
+        embed.set_footer(text="Use o botão abaixo para trabalhar!")
+
+        await ctx.send(embed=embed, view=componentes(self.botao_trabalhar(ctx.author.id)))
+
+    @commands.command(name="bal")
+    async def bal(self, ctx, membro: discord.Member = None):
+        membro = membro or ctx.author
+        saldo = await self.servicos.saldo(membro.id)
+
+        embed = discord.Embed(
+            title=f"📊 Saldo de {membro.name}",
+            description=f"Saldo atual: **{formatar(saldo)}**",
+            color=0x95a5a6
+        )
+        embed.set_thumbnail(url=membro.display_avatar.url)
+        await ctx.send(embed=embed)
+
+    # === VIP ===
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def setvip(self, ctx, membro: discord.Member, dias: int):
+        expira = datetime.now() + timedelta(days=dias)
+        await self.livro.definir_vip(membro.id, {
+            "expira_em": expira.strftime("%Y-%m-%d %H:%M:%S"),
+            "ultimo_claim": None,
+            "custom": ""
+        })
+        await self.livro.confirmar()
+        await ctx.send(f"💎 {membro.mention} recebeu VIP por {dias} dias!")
+
+    @commands.command()
+    async def vipclaim(self, ctx):
+        if not await self.livro.vip(ctx.author.id):
+            return await ctx.send("❌ Você não é VIP.")
+        if not await self.livro.eh_vip(ctx.author.id):
+            return await ctx.send("⛔ Seu VIP expirou.")
+        restante = await self.servicos.resgatar("vipclaim", ctx.author.id, centavos(250), "Recompensa VIP")
+        if restante:
+            return await ctx.send(f"⏳ Espere {timedelta(seconds=restante)} para coletar novamente.")
+        await ctx.send("🎁 Você recebeu R$ 250 como VIP!")
+
+    @commands.command()
+    async def vipedit(self, ctx, *, emoji):
+        vip = await self.livro.vip(ctx.author.id)
+        if not vip:
+            return await ctx.send("❌ Você não é VIP.")
+        if not await self.livro.eh_vip(ctx.author.id):
+            return await ctx.send("⛔ Seu VIP expirou.")
+        vip["custom"] = emoji
+        await self.livro.definir_vip(ctx.author.id, vip)
+        await self.livro.confirmar()
+        await ctx.send(f"✨ Emoji VIP atualizado: {emoji}")
+
+    # === Daily / work ===
+    @commands.command(name="daily")
+    async def daily(self, ctx):
+        recompensa = centavos(500)
+        restante = await self.servicos.resgatar("daily", ctx.author.id, recompensa, "Recompensa diária")
+        if restante:
+            return await ctx.send(embed=embed_cooldown(ctx.author, restante))
+        embed = discord.Embed(
+            title="🎁 Recompensa Diária Coletada!",
+            description=f"{ctx.author.mention}, você recebeu **{formatar(recompensa)}**.",
+            color=0x00ffcc
+        )
+        embed.set_footer(text="Disponível novamente em 24 horas.")
+        await ctx.send(embed=embed)
+
+    async def trabalhar(self, usuario):
+        # Retorna (segundos restantes do cooldown, None) ou (0, embed)
+        ganhos = centavos(random.randint(150, 300))
+        restante = await self.servicos.resgatar("work", usuario.id, ganhos, "Salário do trabalho")
+        if restante:
+            return restante, None
+        embed = discord.Embed(
+            title="💼 Você trabalhou!",
+            description=f"{usuario.mention}, seu esforço rendeu **{formatar(ganhos)}**.",
+            color=0x2ecc71
+        )
+        embed.set_footer(text="Pode trabalhar novamente em 1 hora.")
+        return 0, embed
+
+    @commands.command(name="work")
+    async def work(self, ctx):
+        restante, embed = await self.trabalhar(ctx.author)
+        if restante:
+            return await ctx.send(embed=embed_cooldown(ctx.author, restante))
+        await ctx.send(embed=embed)
+
+    def botao_trabalhar(self, user_id):
+        return Button(label="💼 Trabalhar", style=discord.ButtonStyle.green,
+                      custom_id=self.roteador.custom_id("work", user_id))
+
+    @rota("work")
+    async def trabalhar_pelo_botao(self, interaction, user_id):
+        if interaction.user.id != int(user_id):
+            return await interaction.response.send_message("❌ Esse botão não é pra você.", ephemeral=True)
+
+        restante, embed = await self.trabalhar(interaction.user)
+        if restante:
+            embed = discord.Embed(
+                title="⏳ Aguarde!",
+                description=f"{interaction.user.mention}, você poderá trabalhar novamente em **{timedelta(seconds=restante)}**.",
+                color=0xff9900
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embed)
+
+    # === Ranking e extrato ===
+    @commands.command(name="top")
+    async def top(self, ctx, pagina: int = 1):
+        pagina = max(pagina, 1)
+        inicio = (pagina - 1) * POR_PAGINA_TOP
+        linhas = []
+        for posicao, (uid, saldo) in enumerate(await self.livro.pagina_ranking(inicio, POR_PAGINA_TOP), start=inicio + 1):
+            linhas.append(f"**#{posicao}** <@{uid}> — {formatar(saldo)}")
+
+        embed = discord.Embed(
+            title="🏆 Mais ricos",
+            description="\n".join(linhas) or "Nenhum usuário nesta página.",
+            color=0xf1c40f
+        )
+        posicao = await self.livro.posicao_ranking(ctx.author.id)
+        total_paginas = max(1, -(-await self.livro.total_ranking() // POR_PAGINA_TOP))
+        sua_posicao = f"Sua posição: #{posicao}" if posicao else "Você ainda não está no ranking"
+        embed.set_footer(text=f"Página {pagina}/{total_paginas} • {sua_posicao}")
+        await ctx.send(embed=embed)
+
+    async def montar_extrato(self, user_id, titulo, pagina):
+        # Busca um item a mais só para saber se existe próxima página
+        inicio = pagina * POR_PAGINA_EXTRATO
+        transacoes = await self.livro.extrato(user_id, inicio, POR_PAGINA_EXTRATO + 1)
+        tem_proxima = len(transacoes) > POR_PAGINA_EXTRATO
+        linhas = []
+        for t in transacoes[:POR_PAGINA_EXTRATO]:
+            sinal = "🟢 +" if t["tipo"] == "receita" else "🔴 -"
+            linhas.append(f"`{t['data'][:16]}` {sinal}R$ {t['valor']:,.2f} — {t['descricao']}")
+
+        embed = discord.Embed(
+            title=titulo,
+            description="\n".join(linhas) or "Nenhuma transação encontrada.",
+            color=0x95a5a6
+        )
+        embed.set_footer(text=f"Página {pagina + 1}")
+        return embed, tem_proxima
+
+    def botoes_extrato(self, dono_id, user_id, pagina, tem_proxima):
+        return componentes(
+            Button(label="◀", style=discord.ButtonStyle.secondary, disabled=pagina == 0,
+                   custom_id=self.roteador.custom_id("extrato", dono_id, user_id, pagina - 1)),
+            Button(label="▶", style=discord.ButtonStyle.secondary, disabled=not tem_proxima,
+                   custom_id=self.roteador.custom_id("extrato", dono_id, user_id, pagina + 1)))
+
+    @commands.command(name="extrato")
+    async def extrato(self, ctx, membro: discord.Member = None):
+        membro = membro or ctx.author
+        embed, tem_proxima = await self.montar_extrato(membro.id, f"🧾 Extrato de {membro.name}", 0)
+        await ctx.send(embed=embed, view=self.botoes_extrato(ctx.author.id, membro.id, 0, tem_proxima))
+
+    @rota("extrato")
+    async def mudar_pagina_extrato(self, interaction, dono_id, user_id, pagina):
+        if interaction.user.id != int(dono_id):
+            return await interaction.response.send_message("❌ Esse extrato não é seu.", ephemeral=True)
+        pagina = max(0, int(pagina))
+        embed, tem_proxima = await self.montar_extrato(user_id, interaction.message.embeds[0].title, pagina)
+        await interaction.response.edit_message(embed=embed, view=self.botoes_extrato(dono_id, user_id, pagina, tem_proxima))
+
+    # === Administração da economia ===
+    async def alvos_do_lote(self, ctx, texto):
+        # Usuários mencionados ou com o ID solto no texto, membros dos cargos
+        # mencionados e IDs de um anexo (um por linha, ou separados por
+        # vírgula/espaço). Menções de cargo e de canal não são usuários.
+        ids = {int(i) for i in ID_USUARIO.findall(NAO_USUARIOS.sub("", texto))}
+        for anexo in ctx.message.attachments:
+            conteudo = (await anexo.read()).decode(errors="ignore")
+            ids.update(int(i) for i in ID_USUARIO.findall(NAO_USUARIOS.sub("", conteudo)))
+        if ctx.message.role_mentions:
+            if not self.bot.intents.members:
+                raise commands.BadArgument("Pagar cargos precisa do intent de membros: ative \"Server Members Intent\" "
+                                           "no Developer Portal e rode o bot com BANGUELA_MEMBROS=1.")
+            if not ctx.guild.chunked:
+                await ctx.guild.chunk()
+            for cargo in ctx.message.role_mentions:
+                ids.update(membro.id for membro in cargo.members if not membro.bot)
+        return ids
+
+    async def lancar_em_lote(self, ctx, argumentos, sinal):
+        comando = "badicionar" if sinal > 0 else "bremover"
+        if not await self.livro.eh_autorizado(ctx.author.id):
+            return await ctx.send("⛔ Você não tem permissão para usar este comando.")
+
+        *alvos, valor = argumentos.split() or [None]
+        if valor is None or not (alvos or ctx.message.attachments):
+            return await ctx.send(f"❌ Uso correto: `{comando} @usuário|@cargo|IDs... valor` (ou um anexo .txt com IDs)")
+        try:
+            valor_num = parse_valor(valor)
+            if valor_num <= 0:
+                raise ValueError(valor)
+        except:
+            return await ctx.send("❌ Valor inválido. Use algo como `10k`, `1m`, etc.")
+
+        try:
+            ids = await self.alvos_do_lote(ctx, " ".join(alvos))
+        except commands.BadArgument as erro:
+            return await ctx.send(f"❌ {erro}")
+        if not ids:
+            return await ctx.send("❌ Nenhum usuário encontrado.")
+
+        progresso = None
+        if len(ids) >= LOTE_COM_PROGRESSO:
+            progresso = await ctx.send(f"⏳ Aplicando em {len(ids)} usuários...")
+        descricao = f"{'Adicionado' if sinal > 0 else 'Removido'} por {ctx.author.name}"
+        try:
+            # Todos no mesmo lote: ou todo mundo recebe, ou ninguém
+            await self.livro.aplicar_lote([(uid, sinal * valor_num, descricao) for uid in ids])
+        except SaldoInsuficiente as erro:
+            texto = f"❌ <@{erro.user_id}> não tem saldo suficiente; nada foi alterado."
+            return await (self.editor.imediato(progresso, content=texto) if progresso else ctx.send(texto))
+        except ValueError:
+            texto = "❌ Valor fora do intervalo permitido; nada foi alterado."
+            return await (self.editor.imediato(progresso, content=texto) if progresso else ctx.send(texto))
+        if progresso:
+            self.editor.agendar(progresso, content=f"💾 Gravando {len(ids)} lançamentos...")
+        await self.livro.confirmar()
+
+        verbo = "receberam" if sinal > 0 else "perderam"
+        texto = (f"💰 {ctx.author.mention}: {len(ids)} usuário(s) {verbo} {formatar(valor_num)} cada "
+                 f"(total {formatar(valor_num * len(ids))}).")
+        if len(ids) == 1:
+            texto = f"💰 <@{next(iter(ids))}> {'recebeu' if sinal > 0 else 'perdeu'} {formatar(valor_num)}."
+        if progresso:
+            return await self.editor.imediato(progresso, content=texto)
+        await ctx.send(texto)
+
+    @commands.command(name="adicionar")
+    async def badicionar(self, ctx, *, argumentos: str = ""):
+        await self.lancar_em_lote(ctx, argumentos, 1)
+
+    @commands.command(name="remover")
+    async def bremover(self, ctx, *, argumentos: str = ""):
+        await self.lancar_em_lote(ctx, argumentos, -1)
+
+    # === Economia do servidor ===
+    @commands.command(name="economia")
+    @commands.has_permissions(administrator=True)
+    async def beconomia(self, ctx):
+        resumo = await self.livro.resumo_economia(DIAS_ECONOMIA)
+        embed = discord.Embed(
+            title="📊 Economia",
+            description=f"Dinheiro em circulação: **{formatar(resumo['oferta'])}**",
+            color=0x2ecc71
+        )
+        categorias = sorted(resumo["categorias"].items(), key=lambda item: item[1][2] - item[1][1])
+        linhas = [f"**{nome}** — {quantidade} mov., +{formatar(receitas)} / -{formatar(despesas)} "
+                  f"(líquido {formatar(receitas - despesas)})"
+                  for nome, (quantidade, receitas, despesas) in categorias]
+        embed.add_field(name="Por categoria", value="\n".join(linhas) or "Nenhuma transação ainda.", inline=False)
+        dias = []
+        for dia, por_categoria in sorted(resumo["dias"].items(), reverse=True):
+            receitas = sum(linha[1] for linha in por_categoria.values())
+            despesas = sum(linha[2] for linha in por_categoria.values())
+            dias.append(f"`{dia}` +{formatar(receitas)} / -{formatar(despesas)}")
+        if dias:
+            embed.add_field(name=f"Últimos {len(dias)} dias com movimento", value="\n".join(dias), inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command()
+    async def addgive(self, ctx, acao: str = None, membro: discord.Member = None):
+        if not await self.livro.eh_autorizado(ctx.author.id):
+            return await ctx.send("⛔ Você não tem permissão para isso.")
+
+        if acao not in ["give", "remove"] or membro is None:
+            return await ctx.send("❌ Uso correto: `baddgive give @usuário` ou `baddgive remove @usuário`")
+
+        if acao == "give":
+            if await self.livro.eh_autorizado(membro.id):
+                return await ctx.send("⚠️ Esse usuário já tem permissão.")
+            await self.livro.adicionar_autorizado(membro.id)
+            await self.livro.confirmar()
+            await ctx.send(f"✅ {membro.mention} agora pode usar comandos de administração.")
+        else:
+            if not await self.livro.eh_autorizado(membro.id):
+                return await ctx.send("⚠️ Esse usuário não tinha permissão.")
+            await self.livro.remover_autorizado(membro.id)
+            await self.livro.confirmar()
+            await ctx.send(f"🚫 Permissão removida de {membro.mention}.")
+
+
+async def setup(bot):
+    await bot.add_cog(Economia(bot))
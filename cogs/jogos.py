@@ -0,0 +1,309 @@
+import random
+
+import discord
+from discord.ext import commands
+from discord.ui import Button
+
+from componentes import componentes, rota
+from livro_caixa import SaldoInsuficiente
+from modelo import centavos, formatar, parse_valor
+from servicos import CogBanguela, Pote
+
+PRAZO_DUELO = 60
+PRAZO_RINHA = 60
+PRAZO_COPO = 15
+PRAZO_APOSTA = 30
+EMOJIS_RINHA = ["🐸", "🐷", "🐵", "🐱", "🐶", "🐔", "🦊"]
+EMOJIS_APOSTA = ["🐶", "🐱", "🦊", "🐵", "🐸", "🧙", "🤖", "👻", "😈", "💀", "👽", "🧛"]
+
+
+class Jogos(CogBanguela):
+    async def get_emoji(self, uid, padrao):
+        emoji = await self.livro.emoji_vip(uid)
+        if emoji:
+            return emoji
+        return random.choice(EMOJIS_APOSTA)
+
+    # === Duelo ===
+    @commands.command()
+    async def duelar(self, ctx, membro: discord.Member, valor: str):
+        try:
+            valor_num = parse_valor(valor)
+        except:
+            return await ctx.send("❌ Valor inválido. Ex: 10k, 1m...")
+        if valor_num <= 0:
+            return await ctx.send("❌ O valor do duelo deve ser positivo.")
+
+        if membro.id == ctx.author.id:
+            return await ctx.send("🙄 Você não pode duelar com você mesmo!")
+
+        if await self.livro.saldo_disponivel(membro.id) < valor_num:
+            return await ctx.send("⚠️ Ambos precisam ter saldo suficiente.")
+        try:
+            reserva_autor = await self.livro.reservar(ctx.author.id, valor_num)
+        except SaldoInsuficiente:
+            return await ctx.send("⚠️ Ambos precisam ter saldo suficiente.")
+
+        duelo = {"autor": ctx.author, "membro": membro, "valor": valor_num, "reserva": reserva_autor}
+        chave = self.estados.guardar(duelo, PRAZO_DUELO, self.expirar_duelo)
+        duelo["mensagem"] = await ctx.send(
+            f"🎯 {ctx.author.mention} desafiou {membro.mention} para um duelo de {formatar(valor_num)}",
+            view=componentes(
+                Button(label="Aceitar Duelo", style=discord.ButtonStyle.green,
+                       custom_id=self.roteador.custom_id("duelo", chave, "aceitar")),
+                Button(label="Recusar", style=discord.ButtonStyle.red,
+                       custom_id=self.roteador.custom_id("duelo", chave, "recusar"))))
+
+    @rota("duelo")
+    async def responder_duelo(self, interaction, chave, acao):
+        duelo = self.estados.pegar(chave)
+        if duelo is None:
+            return await interaction.response.send_message("⌛ Esse duelo já terminou.", ephemeral=True)
+        autor, membro, valor_num = duelo["autor"], duelo["membro"], duelo["valor"]
+        if interaction.user.id != membro.id:
+            return await interaction.response.send_message(f"❌ Apenas o desafiado pode {acao}.", ephemeral=True)
+
+        if acao == "recusar":
+            self.estados.remover(chave)
+            await self.livro.liberar(duelo["reserva"])
+            return await self.editor.imediato(interaction.message, content="❌ Duelo recusado.", view=None)
+
+        async with self.travas.travar(autor.id, membro.id):
+            if self.estados.pegar(chave) is not duelo:
+                return
+            try:
+                reserva_membro = await self.livro.reservar(membro.id, valor_num)
+            except SaldoInsuficiente:
+                return await interaction.response.send_message("💸 Você não tem saldo suficiente.", ephemeral=True)
+            if self.estados.remover(chave) is not duelo:
+                # Expirou enquanto a reserva era feita
+                return await self.livro.liberar(reserva_membro)
+            vencedor = random.choice([autor, membro])
+            perdedor = membro if vencedor == autor else autor
+
+            await self.livro.liquidar([duelo["reserva"], reserva_membro], [
+                (perdedor.id, -valor_num, f"Perdeu duelo para {vencedor.name}"),
+                (vencedor.id, valor_num, f"Ganhou duelo contra {perdedor.name}")])
+            await self.livro.confirmar()
+
+        await self.editor.imediato(interaction.message, content=f"⚔️ Duelo entre {autor.mention} e {membro.mention} finalizado! 🏆 {vencedor.mention} ganhou {formatar(valor_num)}!", view=None)
+
+    async def expirar_duelo(self, duelo):
+        await self.livro.liberar(duelo["reserva"])
+        await self.editor.imediato(duelo["mensagem"], content="⏰ O duelo expirou sem resposta.", view=None)
+
+    # === Rinha ===
+    @commands.command(name="rinha")
+    async def rinha(self, ctx, valor: str, max_jogadores: int):
+        try:
+            valor_num = parse_valor(valor)
+            if valor_num <= 0 or max_jogadores < 2:
+                return await ctx.send("❌ Valor e jogadores devem ser positivos. Mínimo de 2 jogadores.")
+        except:
+            return await ctx.send("❌ Formato inválido. Ex: brinha 10k 4")
+
+        partida = {"autor": ctx.author, "maximo": max_jogadores, "jogadores": {}, "emojis": {},
+                   "pote": Pote(self.livro, valor_num)}
+        chave = self.estados.guardar(partida, PRAZO_RINHA, self.expirar_rinha)
+
+        embed = discord.Embed(
+            title="🥊 Rinha de Emojis",
+            description=f"{ctx.author.mention} iniciou uma rinha valendo **{formatar(valor_num)}**!\nMáximo de jogadores: {max_jogadores}\n\nClique no botão para entrar!",
+            color=0xe67e22
+        )
+        partida["mensagem"] = await ctx.send(embed=embed, view=componentes(
+            Button(label="Entrar na Rinha 🥊", style=discord.ButtonStyle.success,
+                   custom_id=self.roteador.custom_id("rinha", chave, "entrar")),
+            Button(label="Finalizar Manualmente", style=discord.ButtonStyle.danger,
+                   custom_id=self.roteador.custom_id("rinha", chave, "finalizar"))))
+
+    @rota("rinha")
+    async def responder_rinha(self, interaction, chave, acao):
+        partida = self.estados.pegar(chave)
+        if partida is None:
+            return await interaction.response.send_message("⛔ Essa rinha já foi encerrada!", ephemeral=True)
+        self.estados.renovar(chave)
+        jogadores, pote = partida["jogadores"], partida["pote"]
+
+        if acao == "finalizar":
+            if interaction.user != partida["autor"]:
+                return await interaction.response.send_message("❌ Apenas quem criou pode finalizar.", ephemeral=True)
+            if len(jogadores) < 2:
+                return await interaction.response.send_message("⚠️ Mínimo de 2 jogadores para iniciar.", ephemeral=True)
+            return await self.iniciar_rinha(chave, interaction.message)
+
+        user = interaction.user
+
+        if user.id in pote:
+            return await interaction.response.send_message("⚠️ Você já entrou.", ephemeral=True)
+
+        try:
+            if not await pote.entrar(user.id):
+                return await interaction.response.send_message("⛔ Essa rinha já foi encerrada!", ephemeral=True)
+        except SaldoInsuficiente:
+            return await interaction.response.send_message("💸 Você não tem saldo suficiente.", ephemeral=True)
+
+        jogadores[user.id] = user
+
+        # Pega emoji VIP se tiver
+        emoji = partida["emojis"][user.id] = await self.livro.emoji_vip(user.id) or random.choice(EMOJIS_RINHA)
+
+        await interaction.response.send_message(f"✅ Você entrou na rinha! {emoji}", ephemeral=True)
+
+        if len(jogadores) >= partida["maximo"]:
+            await self.iniciar_rinha(chave, interaction.message)
+        else:
+            self.editor.agendar(interaction.message, content=f"💥 Rinha em andamento: {len(jogadores)}/{partida['maximo']} jogadores")
+
+    async def iniciar_rinha(self, chave, mensagem):
+        partida = self.estados.remover(chave)
+        if partida is None:
+            return
+        jogadores, emojis, pote = partida["jogadores"], partida["emojis"], partida["pote"]
+        await self.editor.imediato(mensagem, content=f"🔥 Rinha iniciada com {len(jogadores)}/{partida['maximo']} jogadores!", view=None)
+
+        async with self.travas.travar(*jogadores):
+            vencedor = random.choice(list(jogadores.values()))
+            premio_total = pote.total
+            await pote.liquidar({vencedor.id: premio_total}, "Entrou na rinha", "Ganhou a rinha")
+            await self.livro.confirmar()
+
+        emotes = [f"{emojis[j.id]} {j.display_name}" for j in jogadores.values()]
+        texto = "\n".join(emotes)
+
+        await mensagem.channel.send(f"🔥 Rinha finalizada!\n\n{texto}\n\n🏆 Vencedor: **{vencedor.mention}** ganhou **{formatar(premio_total)}**!")
+
+    async def expirar_rinha(self, partida):
+        await partida["pote"].cancelar()
+        self.editor.cancelar(partida["mensagem"])
+        await partida["mensagem"].channel.send("⏳ A rinha expirou sem participantes suficientes.")
+
+    # === Copo ===
+    def botoes_copo(self, chave, desativados=False):
+        return componentes(*(
+            Button(label=rotulo, style=discord.ButtonStyle.primary, disabled=desativados,
+                   custom_id=self.roteador.custom_id("copo", chave, numero))
+            for numero, rotulo in enumerate(["1️⃣", "2️⃣", "3️⃣"], start=1)))
+
+    @commands.command(name="copo")
+    async def copo(self, ctx, valor: str):
+        try:
+            valor_num = parse_valor(valor)
+        except:
+            return await ctx.send("❌ Valor inválido. Ex: 10k, 1m...")
+        if valor_num <= 0:
+            return await ctx.send("❌ O valor da aposta deve ser positivo.")
+
+        try:
+            reserva = await self.livro.reservar(ctx.author.id, valor_num)
+        except SaldoInsuficiente:
+            return await ctx.send("💸 Você não tem saldo suficiente.")
+
+        jogo = {"autor": ctx.author, "valor": valor_num, "reserva": reserva, "certo": random.randint(1, 3)}
+        jogo["chave"] = chave = self.estados.guardar(jogo, PRAZO_COPO, self.expirar_copo)
+        jogo["mensagem"] = await ctx.send(f"🔍 Onde está o copo premiado, {ctx.author.mention}? Escolha abaixo!",
+                                          view=self.botoes_copo(chave))
+
+    @rota("copo")
+    async def escolher_copo(self, interaction, chave, escolhido):
+        jogo = self.estados.pegar(chave)
+        if jogo is None:
+            return await interaction.response.send_message("⌛ Esse jogo já terminou.", ephemeral=True)
+        autor, valor_num, copo_certo = jogo["autor"], jogo["valor"], jogo["certo"]
+        if interaction.user.id != autor.id:
+            return await interaction.response.send_message("❌ Esse jogo não é seu.", ephemeral=True)
+        escolhido = int(escolhido)
+
+        async with self.travas.travar(autor.id):
+            if self.estados.remover(chave) is None:
+                return
+            if escolhido == copo_certo:
+                movimento = (autor.id, valor_num, "Acertou o copo")
+            else:
+                movimento = (autor.id, -valor_num, "Errou o copo")
+            await self.livro.liquidar([jogo["reserva"]], [movimento])
+            await self.livro.confirmar()
+
+        await interaction.response.edit_message(view=self.botoes_copo(chave, desativados=True))
+
+        if escolhido == copo_certo:
+            await interaction.followup.send(f"🥳 Parabéns {autor.mention}! Você acertou e ganhou {formatar(valor_num)}!")
+        else:
+            await interaction.followup.send(f"💔 Você errou, o copo certo era o **{copo_certo}**. Você perdeu {formatar(valor_num)}.")
+
+    async def expirar_copo(self, jogo):
+        await self.livro.liberar(jogo["reserva"])
+        await self.editor.imediato(jogo["mensagem"], content="⏰ Tempo esgotado! O jogo foi cancelado.",
+                                   view=self.botoes_copo(jogo["chave"], desativados=True))
+
+    # === Cara ou coroa ===
+    def botao_aposta(self, chave, desativado=False):
+        return componentes(Button(label="Aceitar Aposta", style=discord.ButtonStyle.success, disabled=desativado,
+                                  custom_id=self.roteador.custom_id("aposta", chave)))
+
+    @commands.command(name="bet")
+    async def bbet(self, ctx, membro: discord.Member, valor: int):
+        autor = ctx.author
+        if membro.bot or membro.id == autor.id:
+            return await ctx.reply("Mencione um usuário válido que não seja você nem um bot.")
+
+        if valor <= 0:
+            return await ctx.reply("Informe um valor válido para aposta.")
+        aposta = centavos(valor)
+
+        if await self.livro.saldo_disponivel(membro.id) < aposta:
+            return await ctx.reply(f"{membro.mention} não tem saldo suficiente para essa aposta.")
+        try:
+            reserva_autor = await self.livro.reservar(autor.id, aposta)
+        except SaldoInsuficiente:
+            return await ctx.reply("Você não tem saldo suficiente para essa aposta.")
+
+        emoji_autor = await self.get_emoji(autor.id, "👤")
+        emoji_membro = await self.get_emoji(membro.id, "👥")
+
+        jogo = {"autor": autor, "membro": membro, "valor": valor, "aposta": aposta, "reserva": reserva_autor}
+        jogo["chave"] = chave = self.estados.guardar(jogo, PRAZO_APOSTA, self.expirar_aposta)
+        embed = discord.Embed(title="🎲 Aposta: Cara ou Coroa",
+                              description=f"{emoji_autor} {autor.mention} desafiou {emoji_membro} {membro.mention} para uma aposta de **{valor} moedas**!\n\nClique em **Aceitar Aposta** para jogar cara ou coroa.",
+                              color=discord.Color.orange())
+        jogo["mensagem"] = await ctx.send(embed=embed, view=self.botao_aposta(chave))
+
+    @rota("aposta")
+    async def aceitar_aposta(self, interaction, chave):
+        jogo = self.estados.pegar(chave)
+        if jogo is None:
+            return await interaction.response.send_message("⌛ Essa aposta já terminou.", ephemeral=True)
+        autor, membro, valor, aposta = jogo["autor"], jogo["membro"], jogo["valor"], jogo["aposta"]
+        if interaction.user.id != membro.id:
+            return await interaction.response.send_message("Somente o desafiado pode aceitar.", ephemeral=True)
+
+        async with self.travas.travar(autor.id, membro.id):
+            if self.estados.pegar(chave) is not jogo:
+                return
+            try:
+                reserva_membro = await self.livro.reservar(membro.id, aposta)
+            except SaldoInsuficiente:
+                return await interaction.response.send_message("Você não tem saldo suficiente para essa aposta.", ephemeral=True)
+            if self.estados.remover(chave) is not jogo:
+                # Expirou enquanto a reserva era feita
+                return await self.livro.liberar(reserva_membro)
+
+            resultado = random.choice(["cara", "coroa"])
+            vencedor = autor if resultado == "cara" else membro
+            perdedor = membro if vencedor == autor else autor
+
+            await self.livro.liquidar([jogo["reserva"], reserva_membro], [
+                (perdedor.id, -aposta, f"Perdeu aposta cara ou coroa para {vencedor.name}"),
+                (vencedor.id, aposta, f"Venceu aposta cara ou coroa contra {perdedor.name}")])
+            await self.livro.confirmar()
+
+        await interaction.response.edit_message(content=f"🪙 A moeda caiu em **{resultado}**!\n🏆 {vencedor.mention} venceu e ganhou **{valor} moedas**!", view=None)
+
+    async def expirar_aposta(self, jogo):
+        await self.livro.liberar(jogo["reserva"])
+        await self.editor.imediato(jogo["mensagem"], content="⏰ Tempo esgotado para aceitar a aposta.",
+                                   view=self.botao_aposta(jogo["chave"], desativado=True))
+
+
+async def setup(bot):
+    await bot.add_cog(Jogos(bot))
@@ -0,0 +1,176 @@
+import io
+import time
+from datetime import timedelta
+
+import discord
+from discord.ext import commands
+from discord.ui import Button
+
+from componentes import componentes, rota
+from metricas import metricas
+from servicos import CogBanguela
+
+# Confirmações valem por PRAZO_CONFIRMACAO segundos. Quem pediu, até quando
+# vale e os argumentos vão no custom_id; só o motivo (texto livre) fica em
+# "estados".
+PRAZO_CONFIRMACAO = 180
+ACOES_CONFIRMACAO = {}
+
+
+def acao_confirmada(nome, cancelado):
+    def registrar(executar):
+        ACOES_CONFIRMACAO[nome] = (executar, cancelado)
+        return executar
+    return registrar
+
+
+async def buscar_membro(guild, user_id):
+    return guild.get_member(int(user_id)) or await guild.fetch_member(int(user_id))
+
+
+class Moderacao(CogBanguela):
+    # === Confirmações ===
+    def botoes_confirmacao(self, ctx, acao, *args, rotulo="Confirmar", estilo=discord.ButtonStyle.danger):
+        base = (acao, ctx.author.id, int(time.time()) + PRAZO_CONFIRMACAO, *args)
+        return componentes(
+            Button(label=rotulo, style=estilo, custom_id=self.roteador.custom_id("confirmar", "sim", *base)),
+            Button(label="Cancelar", style=discord.ButtonStyle.secondary,
+                   custom_id=self.roteador.custom_id("confirmar", "nao", *base)))
+
+    def guardar_motivo(self, motivo):
+        return self.estados.guardar(motivo, PRAZO_CONFIRMACAO)
+
+    @rota("confirmar")
+    async def responder_confirmacao(self, interaction, resposta, acao, autor_id, expira, *args):
+        if interaction.user.id != int(autor_id):
+            return await interaction.response.send_message("❌ Só quem usou o comando pode responder.", ephemeral=True)
+        executar, cancelado = ACOES_CONFIRMACAO[acao]
+        if time.time() > int(expira):
+            return await interaction.response.edit_message(content="⌛ Essa confirmação expirou.", view=None)
+        if resposta == "nao":
+            return await interaction.response.edit_message(content=cancelado, view=None)
+        await interaction.response.edit_message(content=await executar(self, interaction, *args), view=None)
+
+    # === Canal ===
+    @commands.command()
+    @commands.has_permissions(manage_channels=True)
+    async def block(self, ctx):
+        await ctx.send("Deseja realmente bloquear o canal?", view=self.botoes_confirmacao(ctx, "block"))
+
+    @acao_confirmada("block", "❌ Cancelado.")
+    async def confirmar_block(self, interaction):
+        await interaction.channel.set_permissions(interaction.guild.default_role, send_messages=False)
+        return "🔒 Canal bloqueado com sucesso!"
+
+    @commands.command()
+    @commands.has_permissions(manage_channels=True)
+    async def unlock(self, ctx):
+        await ctx.send("Deseja realmente desbloquear o canal?",
+                       view=self.botoes_confirmacao(ctx, "unlock", estilo=discord.ButtonStyle.success))
+
+    @acao_confirmada("unlock", "❌ Cancelado.")
+    async def confirmar_unlock(self, interaction):
+        await interaction.channel.set_permissions(interaction.guild.default_role, send_messages=True)
+        return "🔓 Canal desbloqueado com sucesso!"
+
+    # === Membros ===
+    @commands.command()
+    @commands.has_permissions(ban_members=True)
+    async def ban(self, ctx, membro: discord.Member, *, motivo="Sem motivo"):
+        await ctx.send(f"Deseja banir {membro.mention}?",
+                       view=self.botoes_confirmacao(ctx, "ban", membro.id, self.guardar_motivo(motivo), rotulo="Confirmar Ban"))
+
+    @acao_confirmada("ban", "❌ Ban cancelado.")
+    async def confirmar_ban(self, interaction, membro_id, chave_motivo):
+        motivo = self.estados.remover(chave_motivo)
+        if motivo is None:
+            return "⌛ Essa confirmação expirou."
+        membro = await buscar_membro(interaction.guild, membro_id)
+        await membro.ban(reason=motivo)
+        return f"✅ {membro} foi banido. Motivo: {motivo}"
+
+    @commands.command()
+    @commands.has_permissions(ban_members=True)
+    async def unban(self, ctx, user_id: int):
+        user = await self.bot.fetch_user(user_id)
+        await ctx.send(f"Deseja desbanir `{user}`?",
+                       view=self.botoes_confirmacao(ctx, "unban", user.id, rotulo="Confirmar Unban", estilo=discord.ButtonStyle.success))
+
+    @acao_confirmada("unban", "❌ Unban cancelado.")
+    async def confirmar_unban(self, interaction, user_id):
+        user = await self.bot.fetch_user(int(user_id))
+        await interaction.guild.unban(user)
+        return f"✅ {user} foi desbanido."
+
+    @commands.command()
+    @commands.has_permissions(moderate_members=True)
+    async def mute(self, ctx, membro: discord.Member, tempo: int, *, motivo="Sem motivo"):
+        await ctx.send(f"Você quer mutar {membro.mention} por {tempo} minutos?",
+                       view=self.botoes_confirmacao(ctx, "mute", membro.id, tempo, self.guardar_motivo(motivo), rotulo="Confirmar Mute"))
+
+    @acao_confirmada("mute", "❌ Mute cancelado.")
+    async def confirmar_mute(self, interaction, membro_id, tempo, chave_motivo):
+        motivo = self.estados.remover(chave_motivo)
+        if motivo is None:
+            return "⌛ Essa confirmação expirou."
+        membro = await buscar_membro(interaction.guild, membro_id)
+        duration = discord.utils.utcnow() + timedelta(minutes=int(tempo))
+        await membro.timeout(until=duration, reason=motivo)
+        return f"🔇 {membro.mention} foi mutado por {tempo} minutos. Motivo: {motivo}"
+
+    @commands.command()
+    @commands.has_permissions(manage_messages=True)
+    async def aviso(self, ctx, membro: discord.Member, *, motivo="Sem motivo"):
+        await ctx.send(f"⚠️ {membro.mention} recebeu um aviso.\nMotivo: {motivo}")
+        try:
+            await membro.send(f"⚠️ Você foi avisado no servidor **{ctx.guild.name}**.\nMotivo: {motivo}")
+        except:
+            pass
+
+    @commands.command()
+    @commands.has_permissions(kick_members=True)
+    async def kickar(self, ctx, membro: discord.Member, *, motivo="Não informado"):
+        await ctx.send(f"Deseja realmente **expulsar {membro}**?",
+                       view=self.botoes_confirmacao(ctx, "kick", membro.id, self.guardar_motivo(motivo)))
+
+    @acao_confirmada("kick", "❌ Ação cancelada.")
+    async def confirmar_kick(self, interaction, membro_id, chave_motivo):
+        motivo = self.estados.remover(chave_motivo)
+        if motivo is None:
+            return "⌛ Essa confirmação expirou."
+        membro = await buscar_membro(interaction.guild, membro_id)
+        await membro.kick(reason=motivo)
+        return f"✅ {membro} foi expulso.\nMotivo: {motivo}"
+
+    # === Métricas ===
+    @commands.command()
+    @commands.has_permissions(administrator=True)
+    async def stats(self, ctx):
+        latencias = metricas.por_rotulo("comando_segundos", "comando")
+        # Comandos que mais somaram tempo primeiro
+        mais_caros = sorted(latencias.items(), key=lambda item: item[1].soma, reverse=True)[:10]
+        linhas = [f"`{nome}` — {h.total}x, p50 ≤ {h.percentil(0.5) * 1000:g} ms, "
+                  f"p99 ≤ {h.percentil(0.99) * 1000:g} ms, total {h.soma:.2f} s"
+                  for nome, h in mais_caros]
+        erros = metricas.total("comando_erros")
+        leituras = metricas.total("livro_leituras")
+        escritas = metricas.total("livro_escritas")
+        serializados = metricas.total("serializacao_bytes")
+        acertos = metricas.total("cache_usuarios_acertos")
+        faltas = metricas.total("cache_usuarios_faltas")
+        despejos = metricas.total("cache_usuarios_despejos")
+        recusas = metricas.total("admissao_recusas")
+
+        embed = discord.Embed(title="📊 Métricas do Banguela", color=0x2b2d31)
+        embed.add_field(name="Comandos", value="\n".join(linhas) or "Nenhum comando medido ainda.", inline=False)
+        embed.add_field(name="Erros", value=str(erros))
+        embed.add_field(name="Livro caixa", value=f"{leituras} leituras / {escritas} escritas")
+        embed.add_field(name="Serializado", value=f"{serializados / 1024:,.1f} KiB")
+        embed.add_field(name="Cache de usuários", value=f"{acertos} acertos / {faltas} faltas / {despejos} despejos")
+        embed.add_field(name="Admissão", value=f"{recusas} recusados / {self.servicos.admissao.em_andamento} em andamento")
+        arquivo = discord.File(io.BytesIO(metricas.exposicao().encode()), filename="metricas.txt")
+        await ctx.send(embed=embed, file=arquivo)
+
+
+async def setup(bot):
+    await bot.add_cog(Moderacao(bot))
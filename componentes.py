@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import math
+import secrets
+
+import discord
+from discord.ui import View
+
+from admissao import Recusado
+
+log = logging.getLogger(__name__)
+
+# custom_id dos componentes do bot: "b:<rota>:<arg>:<arg>..."
+PREFIXO = "b"
+SEPARADOR = ":"
+TAMANHO_MAXIMO_ID = 100
+# Largura (segundos) de cada casa da roda de prazos dos estados
+RESOLUCAO_PRAZO = 1.0
+
+
+# === Estado no servidor ===
+# O que não cabe no custom_id (reservas, membros, listas de jogadores) fica
+# aqui, sob uma chave curta, até o jogo terminar ou o prazo vencer. Quando
+# vence, ao_expirar(estado) é chamado — o equivalente ao on_timeout das
+# Views. Uma chave nova por estado, então botões de antes de um reinício
+# nunca apontam para o estado de outro jogo.
+# Os prazos ficam numa roda de casas de RESOLUCAO_PRAZO segundos (casa ->
+# chaves) girada por um único timer, e só enquanto houver estado: guardar,
+# renovar e remover são O(1) e não criam um timer (nem tarefa) por estado.
+# Renovar ou remover não mexe na casa antiga; a casa confere o prazo de
+# cada chave quando vence e ignora as que já saíram ou foram renovadas.
+class Estados:
+    def __init__(self):
+        self._estados = {}
+        self._roda = {}
+        self._girada = None
+        self._timer = None
+
+    def __len__(self):
+        return len(self._estados)
+
+    def guardar(self, estado, ttl, ao_expirar=None):
+        chave = secrets.token_hex(4)
+        while chave in self._estados:
+            chave = secrets.token_hex(4)
+        self._estados[chave] = [estado, ttl, ao_expirar, 0]
+        self.renovar(chave)
+        return chave
+
+    def pegar(self, chave):
+        entrada = self._estados.get(chave)
+        return entrada[0] if entrada is not None else None
+
+    def renovar(self, chave):
+        # Reinicia o prazo, como uma View faz a cada interação
+        entrada = self._estados[chave]
+        loop = asyncio.get_running_loop()
+        entrada[3] = loop.time() + entrada[1]
+        self._roda.setdefault(math.ceil(entrada[3] / RESOLUCAO_PRAZO), set()).add(chave)
+        if self._timer is None:
+            self._girada = math.floor(loop.time() / RESOLUCAO_PRAZO)
+            self._timer = loop.call_at((self._girada + 1) * RESOLUCAO_PRAZO, self._girar)
+
+    def remover(self, chave):
+        entrada = self._estados.pop(chave, None)
+        return entrada[0] if entrada is not None else None
+
+    def _girar(self):
+        loop = asyncio.get_running_loop()
+        agora = loop.time()
+        atual = math.floor(agora / RESOLUCAO_PRAZO)
+        for casa in range(self._girada + 1, atual + 1):
+            for chave in self._roda.pop(casa, ()):
+                entrada = self._estados.get(chave)
+                if entrada is not None and entrada[3] <= agora:
+                    self._expirar(chave)
+        self._girada = atual
+        self._timer = loop.call_at((atual + 1) * RESOLUCAO_PRAZO, self._girar) if self._roda else None
+
+    def _expirar(self, chave):
+        estado, _, ao_expirar, _ = self._estados.pop(chave)
+        if ao_expirar is not None:
+            asyncio.create_task(self._avisar(ao_expirar, estado))
+
+    async def _avisar(self, ao_expirar, estado):
+        try:
+            await ao_expirar(estado)
+        except Exception:
+            log.exception("Falha ao expirar estado de componente")
+
+
+# === Roteador ===
+# Um handler por rota, registrado quando o cog carrega. As mensagens são
+# enviadas com Views já paradas (que o discord.py não guarda) e todo clique
+# chega aqui pelo evento on_interaction, inclusive depois de um reinício.
+# Com a admissão do bot, as rotas que mexem no livro caixa passam pelos
+# mesmos baldes e limite de trabalho em andamento que os comandos.
+def rota(nome):
+    # Marca um método de cog como handler da rota "nome"
+    def marcar(metodo):
+        metodo.__rota__ = nome
+        return metodo
+    return marcar
+
+
+class Roteador:
+    def __init__(self):
+        self._rotas = {}
+
+    def adicionar_cog(self, cog):
+        for atributo in vars(type(cog)).values():
+            nome = getattr(atributo, "__rota__", None)
+            if nome is not None:
+                self._rotas[nome] = atributo.__get__(cog)
+
+    def remover_cog(self, cog):
+        for nome, handler in list(self._rotas.items()):
+            if getattr(handler, "__self__", None) is cog:
+                del self._rotas[nome]
+
+    def custom_id(self, nome, *args):
+        custom_id = SEPARADOR.join([PREFIXO, nome, *map(str, args)])
+        if len(custom_id) > TAMANHO_MAXIMO_ID:
+            raise ValueError(f"custom_id longo demais: {custom_id}")
+        return custom_id
+
+    async def despachar(self, interaction, admissao=None):
+        if interaction.type != discord.InteractionType.component:
+            return
+        partes = interaction.data.get("custom_id", "").split(SEPARADOR)
+        if len(partes) < 2 or partes[0] != PREFIXO:
+            return
+        handler = self._rotas.get(partes[1])
+        if handler is None:
+            return
+        admitido = False
+        if admissao is not None:
+            try:
+                admitido = await admissao.admitir_clique(interaction, partes[1])
+            except Recusado:
+                return
+        try:
+            await handler(interaction, *partes[2:])
+        finally:
+            if admitido:
+                admissao.concluir()
+
+
+def componentes(*itens):
+    # View só como contêiner dos componentes: parada antes do envio, não
+    # fica em memória nem tem timeout próprio.
+    view = View(timeout=None)
+    for item in itens:
+        view.add_item(item)
+    view.stop()
+    return view
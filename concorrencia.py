@@ -0,0 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+# === Travas por usuário ===
+# Cada usuário tem a própria trava, criada sob demanda e descartada quando
+# ninguém mais a usa. Comandos de usuários diferentes nunca esperam uns
+# pelos outros; quando uma operação envolve vários usuários, as travas são
+# adquiridas sempre na mesma ordem para evitar deadlock.
+class TravasUsuarios:
+    def __init__(self):
+        self._travas = {}
+
+    def __len__(self):
+        return len(self._travas)
+
+    def _pegar(self, uid):
+        entrada = self._travas.get(uid)
+        if entrada is None:
+            entrada = self._travas[uid] = [asyncio.Lock(), 0]
+        entrada[1] += 1
+        return entrada[0]
+
+    def _devolver(self, uid):
+        entrada = self._travas[uid]
+        entrada[1] -= 1
+        if entrada[1] == 0:
+            del self._travas[uid]
+
+    @asynccontextmanager
+    async def travar(self, *user_ids):
+        uids = sorted({int(u) for u in user_ids})
+        travas = [self._pegar(uid) for uid in uids]
+        adquiridas = []
+        try:
+            for trava in travas:
+                await trava.acquire()
+                adquiridas.append(trava)
+            yield
+        finally:
+            for trava in reversed(adquiridas):
+                trava.release()
+            for uid in uids:
+                self._devolver(uid)
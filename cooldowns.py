@@ -0,0 +1,47 @@
+import heapq
+import time
+
+
+# Duração (segundos) de cada cooldown
+DURACOES = {
+    "daily": 86400,
+    "work": 3600,
+    "vipclaim": 18000,
+}
+
+
+def agora():
+    return int(time.time())
+
+
+# === Cooldowns ===
+# Expirações em epoch (segundos) por comando e usuário:
+#   {"daily": {"<uid>": 1749300000}, "work": {...}, ...}
+# O dicionário é o mesmo que vai para o armazenamento; o heap só serve para
+# descartar as entradas vencidas sem varrer tudo.
+class Cooldowns:
+    def __init__(self, expiracoes=None):
+        self.expiracoes = expiracoes if expiracoes is not None else {}
+        self._heap = [(expira, nome, uid)
+                      for nome, por_usuario in self.expiracoes.items()
+                      for uid, expira in por_usuario.items()]
+        heapq.heapify(self._heap)
+
+    def restante(self, nome, uid, momento=None):
+        momento = agora() if momento is None else momento
+        expira = self.expiracoes.get(nome, {}).get(uid)
+        if expira is None or expira <= momento:
+            return 0
+        return expira - momento
+
+    def definir(self, nome, uid, expira):
+        self.expiracoes.setdefault(nome, {})[uid] = expira
+        heapq.heappush(self._heap, (expira, nome, uid))
+
+    def purgar(self, momento=None):
+        momento = agora() if momento is None else momento
+        while self._heap and self._heap[0][0] <= momento:
+            expira, nome, uid = heapq.heappop(self._heap)
+            por_usuario = self.expiracoes.get(nome)
+            if por_usuario is not None and por_usuario.get(uid) == expira:
+                del por_usuario[uid]
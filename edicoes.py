@@ -0,0 +1,80 @@
+import asyncio
+import logging
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# No máximo uma edição por mensagem a cada JANELA_EDICAO segundos
+JANELA_EDICAO = 1.0
+
+
+class _Estado:
+    __slots__ = ("mensagem", "campos", "tarefa", "edicao", "ultima")
+
+    def __init__(self, mensagem):
+        self.mensagem = mensagem
+        self.campos = {}
+        self.tarefa = None
+        self.edicao = None
+        self.ultima = float("-inf")
+
+
+# === Edições agrupadas ===
+# Lobbies que mudam a cada clique (rinha, duelo...) não editam a mensagem
+# direto: agendar() guarda o estado mais recente e uma tarefa por mensagem
+# aplica a edição no máximo uma vez por janela. Estados intermediários que
+# chegam enquanto uma edição espera (ou está presa no rate limit) são
+# descartados; só o último vai para o Discord.
+class EditorMensagens:
+    def __init__(self, janela=JANELA_EDICAO):
+        self.janela = janela
+        self._estados = {}
+
+    def __len__(self):
+        return len(self._estados)
+
+    def agendar(self, mensagem, **campos):
+        estado = self._estados.get(mensagem.id)
+        if estado is None:
+            estado = self._estados[mensagem.id] = _Estado(mensagem)
+        estado.campos.update(campos)
+        if estado.tarefa is None:
+            estado.tarefa = asyncio.create_task(self._rodar(mensagem.id, estado))
+
+    def cancelar(self, mensagem):
+        estado = self._estados.pop(mensagem.id, None)
+        if estado is not None and estado.tarefa is not None:
+            estado.tarefa.cancel()
+        return estado
+
+    async def imediato(self, mensagem, **campos):
+        # Estado final: descarta o que estava pendente e edita agora, depois
+        # de uma edição que já esteja a caminho.
+        estado = self.cancelar(mensagem)
+        if estado is not None and estado.edicao is not None and not estado.edicao.done():
+            await asyncio.wait([estado.edicao])
+        await self._editar(mensagem, campos)
+
+    async def _editar(self, mensagem, campos):
+        try:
+            await mensagem.edit(**campos)
+        except discord.HTTPException:
+            log.exception("Falha ao editar a mensagem %s", mensagem.id)
+
+    async def _rodar(self, chave, estado):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                espera = estado.ultima + self.janela - loop.time()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                if not estado.campos:
+                    break
+                campos, estado.campos = estado.campos, {}
+                estado.ultima = loop.time()
+                estado.edicao = asyncio.ensure_future(self._editar(estado.mensagem, campos))
+                await asyncio.shield(estado.edicao)
+        finally:
+            if self._estados.get(chave) is estado:
+                del self._estados[chave]
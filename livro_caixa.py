@@ -0,0 +1,560 @@
+import asyncio
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from agregados import Agregados
+from armazenamento import OPERACOES_USUARIO, dados_vazios
+from cache_usuarios import CacheUsuarios
+from cooldowns import DURACOES, Cooldowns, agora
+from metricas import metricas
+from modelo import Descricoes, Usuario, cabe, centavos, reais
+from ranking import Ranking
+from vips import IndiceVips
+
+log = logging.getLogger(__name__)
+
+# Intervalo máximo (segundos) entre gravações e quantidade de alterações
+# pendentes que antecipa a gravação.
+INTERVALO_FLUSH = 5.0
+LOTE_FLUSH = 50
+# Janela (segundos) em que pedidos de confirmação são agrupados numa única
+# gravação durável.
+JANELA_AGRUPAMENTO = 0.005
+# Quantas transações recentes de cada usuário ficam em memória; as mais
+# antigas vão para o arquivo em blocos de LOTE_ARQUIVO.
+JANELA_QUENTE = 50
+LOTE_ARQUIVO = 50
+# De quanto em quanto tempo (segundos) o diário vira um snapshot compacto
+INTERVALO_COMPACTACAO = 300.0
+
+# Métodos que lançam no histórico (e por isso precisam do usuário
+# hidratado) -> onde estão os usuários nos argumentos. Quem chama o livro
+# (LivroLocal, ServidorLivro) hidrata esses usuários fora do loop antes.
+USUARIOS_DA_CHAMADA = {
+    "lancar": lambda user_id, *_: [user_id],
+    "transferir": lambda de, para, *_: [de, para],
+    "aplicar_lote": lambda movimentos: [user_id for user_id, *_ in movimentos],
+    "liquidar": lambda reservas, movimentos: [user_id for user_id, *_ in movimentos],
+    "resgatar": lambda nome, user_id, *_: [user_id],
+}
+
+_PARAR = object()
+
+
+class SaldoInsuficiente(Exception):
+    def __init__(self, user_id):
+        super().__init__(f"Saldo insuficiente para {user_id}")
+        self.user_id = user_id
+
+
+class Reserva:
+    __slots__ = ("user_id", "valor", "ativa")
+
+    def __init__(self, user_id, valor):
+        self.user_id = user_id
+        self.valor = valor
+        self.ativa = True
+
+
+class LivroCaixa:
+    def __init__(self, armazenamento, intervalo=INTERVALO_FLUSH, lote=LOTE_FLUSH,
+                 janela=JANELA_AGRUPAMENTO, intervalo_compactacao=INTERVALO_COMPACTACAO,
+                 janela_quente=JANELA_QUENTE, limite_cache=None, limite_cache_bytes=None):
+        self.armazenamento = armazenamento
+        self.intervalo = intervalo
+        self.lote = lote
+        self.janela = janela
+        self.intervalo_compactacao = intervalo_compactacao
+        self.janela_quente = janela_quente
+        # Só valem com um armazenamento que lê um usuário por vez (SQLite);
+        # sem limites todos os usuários ficam em memória
+        self.limite_cache = limite_cache
+        self.limite_cache_bytes = limite_cache_bytes
+        self.dados = dados_vazios()
+        self.usuarios = CacheUsuarios()
+        self.carregado = False
+        self.operacoes = []
+        # Usuários alterados desde a última compactação
+        self.alterados = set()
+        self.reservado = {}
+        self.descricoes = Descricoes()
+        self.ranking = Ranking()
+        self.agregados = Agregados(self.dados["economia"])
+        self.autorizados = set()
+        self.cooldowns = Cooldowns(self.dados["cooldowns"])
+        self.indice_vips = IndiceVips()
+        # Chamado (uid, vip) quando um VIP vence; ex.: avisar o usuário por DM
+        self.ao_expirar_vip = None
+        self._tarefa = None
+        self._tarefa_vips = None
+        self._vips_alterados = None
+        self._fila = None
+        self._em_voo = None
+        # Toda a E/S do armazenamento roda nesta única thread, fora do loop
+        # de eventos e sempre na ordem em que as gravações foram pedidas.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="livro-caixa")
+
+    # === Persistência ===
+    @property
+    def pendentes(self):
+        return len(self.operacoes)
+
+    def carregar(self):
+        preguicoso = (hasattr(self.armazenamento, "ler_usuario")
+                      and (self.limite_cache is not None or self.limite_cache_bytes is not None))
+        if preguicoso:
+            # Só os saldos; cada usuário é hidratado quando for usado
+            self.dados = self.armazenamento.carregar(historicos=False)
+            self.usuarios = CacheUsuarios(self._hidratar, self.limite_cache, self.limite_cache_bytes)
+            self.usuarios.saldos = {uid: centavos(registro["saldo"])
+                                    for uid, registro in self.dados.pop("usuarios").items()}
+        else:
+            self.dados = self.armazenamento.carregar()
+            self.usuarios = CacheUsuarios()
+            self.usuarios.carregar({uid: Usuario.importar(registro, self.descricoes)
+                                    for uid, registro in self.dados.pop("usuarios").items()})
+        self.operacoes = []
+        self.alterados = set(self.armazenamento.nao_compactados)
+        self.carregado = True
+        self.ranking.reconstruir(self.usuarios.saldos)
+        self.agregados = Agregados(self.dados["economia"])
+        self.agregados.oferta = sum(self.usuarios.saldos.values())
+        self.cooldowns = Cooldowns(self.dados["cooldowns"])
+        self.cooldowns.purgar()
+        self.indice_vips.reconstruir(self.dados["vips"])
+        self._carregar_autorizados()
+        # VIPs antigos guardavam o último vipclaim como texto
+        for uid, vip in self.dados["vips"].items():
+            if vip.get("ultimo_claim") and not self.cooldowns.restante("vipclaim", uid):
+                ultimo = datetime.strptime(vip["ultimo_claim"], "%Y-%m-%d %H:%M:%S").timestamp()
+                expira = int(ultimo) + DURACOES["vipclaim"]
+                if expira > agora():
+                    self.cooldowns.definir("vipclaim", uid, expira)
+        # Históricos antigos (ou de antes do arquivo existir) saem da memória
+        if not preguicoso:
+            for uid in self.usuarios:
+                self._arquivar(uid, 0)
+
+    def _hidratar(self, uid):
+        registro = self.armazenamento.ler_usuario(uid)
+        return Usuario.importar(registro, self.descricoes) if registro is not None else None
+
+    def faltam_hidratar(self, metodo, args):
+        # Usuários que a chamada usaria e que não estão em memória ([] sem
+        # cache limitado, ou se o método não mexe no histórico)
+        usuarios = USUARIOS_DA_CHAMADA.get(metodo)
+        if usuarios is None or not self.usuarios.preguicoso:
+            return []
+        return self.usuarios.faltando([str(uid) for uid in usuarios(*args)])
+
+    async def garantir_usuarios(self, uids):
+        # Lê os usuários na thread de E/S (atrás das gravações já pedidas)
+        # e os coloca no cache, para a operação síncrona que vem em seguida
+        # não ler o SQLite no loop de eventos
+        if not uids:
+            return
+        loop = asyncio.get_running_loop()
+        with metricas.cronometrar("armazenamento_segundos", operacao="hidratar"):
+            usuarios = await loop.run_in_executor(self._executor, lambda: [self._hidratar(uid) for uid in uids])
+        for uid, usuario in zip(uids, usuarios):
+            self.usuarios.hidratado(uid, usuario)
+
+    def _separar_lote(self, compactar):
+        operacoes, self.operacoes = self.operacoes, []
+        conteudo = None
+        if compactar:
+            # O snapshot só reexporta quem mudou desde o anterior. Com o
+            # cache limitado o armazenamento já grava cada operação na
+            # tabela e não usa os usuários do snapshot.
+            alterados = () if self.usuarios.preguicoso else self.alterados
+            conteudo = self.armazenamento.instantaneo(self.exportar(alterados))
+            self.alterados = set()
+        return operacoes, compactar, conteudo
+
+    def exportar(self, uids=None):
+        # Dados no formato do financas.json (reais, datas em texto)
+        uids = self.usuarios if uids is None else uids
+        return {**self.dados, "usuarios": {uid: self.usuarios.obter(uid).exportar(self.descricoes) for uid in uids}}
+
+    def _gravar_lote(self, operacoes, compactar, conteudo):
+        if operacoes:
+            with metricas.cronometrar("armazenamento_segundos", operacao="persistir"):
+                self.armazenamento.persistir(operacoes)
+            metricas.contar("armazenamento_lotes")
+        if compactar:
+            with metricas.cronometrar("armazenamento_segundos", operacao="compactar"):
+                self.armazenamento.compactar(conteudo)
+
+    def salvar(self, compactar=False):
+        # Gravação síncrona; só para quando o escritor não está rodando
+        lote = self._separar_lote(compactar)
+        self._gravar_lote(*lote)
+        self._soltar(lote[0])
+
+    def _soltar(self, operacoes):
+        # Quem só tinha operações neste lote já está no disco e pode sair
+        # do cache; quem mudou de novo durante a gravação continua fixado
+        pendentes = {op[1] for op in self.operacoes if op[0] in OPERACOES_USUARIO}
+        self.usuarios.soltar({op[1] for op in operacoes if op[0] in OPERACOES_USUARIO} - pendentes)
+
+    def registrar(self, *operacao):
+        metricas.contar("livro_escritas", operacao=operacao[0])
+        self.operacoes.append(operacao)
+        if operacao[0] in OPERACOES_USUARIO:
+            self.alterados.add(operacao[1])
+            self.usuarios.fixar(operacao[1])
+        if len(self.operacoes) == self.lote and self._fila is not None:
+            self._fila.put_nowait(None)
+
+    async def confirmar(self):
+        # Retorna quando tudo o que foi registrado até agora estiver gravado
+        if self._tarefa is None:
+            self.salvar()
+            return
+        if self.operacoes:
+            futuro = asyncio.get_running_loop().create_future()
+            self._fila.put_nowait(futuro)
+            with metricas.cronometrar("confirmacao_segundos"):
+                await futuro
+        elif self._em_voo is not None:
+            await asyncio.shield(self._em_voo)
+
+    def iniciar(self):
+        if self._tarefa is None:
+            self._fila = asyncio.Queue()
+            self._tarefa = asyncio.create_task(self._escritor())
+        if self._tarefa_vips is None:
+            self._vips_alterados = asyncio.Event()
+            self._tarefa_vips = asyncio.create_task(self._expirar_vips())
+
+    async def _escritor(self):
+        loop = asyncio.get_running_loop()
+        ultima_compactacao = loop.time()
+        parar = False
+        while not parar:
+            pedidos = []
+            try:
+                pedidos.append(await asyncio.wait_for(self._fila.get(), timeout=self.intervalo))
+                # Group commit: junta tudo o que chegar dentro da janela
+                await asyncio.sleep(self.janela)
+                while not self._fila.empty():
+                    pedidos.append(self._fila.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            parar = _PARAR in pedidos
+            self.cooldowns.purgar()
+            compactar = parar or loop.time() - ultima_compactacao >= self.intervalo_compactacao
+            if not self.operacoes and not compactar:
+                self._resolver(pedidos, None)
+                continue
+
+            self._em_voo = loop.create_future()
+            lote = self._separar_lote(compactar)
+            try:
+                await loop.run_in_executor(self._executor, self._gravar_lote, *lote)
+            except Exception as erro:
+                log.exception("Falha ao gravar o livro caixa")
+                metricas.contar("armazenamento_erros")
+                # Devolve as operações para a próxima tentativa
+                self.operacoes = lote[0] + self.operacoes
+                if compactar:
+                    # Não dá para saber quais segmentos chegaram ao disco
+                    self.alterados.update(self.usuarios)
+                self._resolver(pedidos, erro)
+            else:
+                if compactar:
+                    ultima_compactacao = loop.time()
+                self._soltar(lote[0])
+                self._resolver(pedidos, None)
+
+    def _resolver(self, pedidos, erro):
+        futuros = [p for p in pedidos if isinstance(p, asyncio.Future)]
+        if self._em_voo is not None:
+            futuros.append(self._em_voo)
+            self._em_voo = None
+        for futuro in futuros:
+            if futuro.done():
+                continue
+            if erro is None:
+                futuro.set_result(None)
+            else:
+                futuro.set_exception(erro)
+
+    async def encerrar(self):
+        if self._tarefa_vips is not None:
+            self._tarefa_vips.cancel()
+            try:
+                await self._tarefa_vips
+            except asyncio.CancelledError:
+                pass
+            self._tarefa_vips = None
+        if self._tarefa is not None:
+            self._fila.put_nowait(_PARAR)
+            await self._tarefa
+            self._tarefa = None
+            self._fila = None
+        else:
+            self.salvar(compactar=True)
+        self._executor.shutdown()
+        self.armazenamento.fechar()
+
+    # === Usuários ===
+    # Valores sempre em centavos (int); a conversão para reais só acontece
+    # nas operações enviadas ao armazenamento.
+    def usuario(self, user_id):
+        return self.usuarios.obter(str(user_id), criar=True)
+
+    def saldo(self, user_id):
+        metricas.contar("livro_leituras", leitura="saldo")
+        return self.usuarios.saldo(str(user_id))
+
+    def alterar_saldo(self, user_id, valor):
+        # Só o saldo: não precisa hidratar o usuário
+        uid = str(user_id)
+        saldo = self.usuarios.saldo(uid) + valor
+        self.usuarios.definir_saldo(uid, saldo)
+        self.agregados.oferta += valor
+        self.ranking.atualizar(uid, saldo)
+        self.registrar("saldo", uid, reais(saldo))
+
+    def registrar_transacao(self, user_id, tipo, valor, descricao):
+        uid = str(user_id)
+        historico = self.usuario(uid).transacoes
+        historico.adicionar(agora(), tipo, valor, self.descricoes.indice(descricao))
+        transacao = historico.transacao(len(historico) - 1, self.descricoes)
+        self.agregados.registrar(transacao["data"][:10], tipo, valor, descricao)
+        self.registrar("transacao", uid, transacao)
+        self._arquivar(uid, LOTE_ARQUIVO)
+
+    # === Histórico ===
+    def _arquivar(self, uid, folga):
+        historico = self.usuarios.obter(uid).transacoes
+        excesso = len(historico) - self.janela_quente
+        if excesso > folga:
+            antigas = historico.exportar(self.descricoes, 0, excesso)
+            historico.remover_antigas(excesso)
+            self.registrar("arquivo", uid, antigas)
+
+    async def extrato(self, user_id, inicio, quantidade):
+        # Mais recentes primeiro: a janela quente sai da memória e o resto
+        # é lido do arquivo na thread de gravação, só quando pedido.
+        metricas.contar("livro_leituras", leitura="extrato")
+        uid = str(user_id)
+        await self.garantir_usuarios(self.usuarios.faltando([uid]))
+        usuario = self.usuarios.obter(uid)
+        total_quentes = len(usuario.transacoes) if usuario is not None else 0
+        pagina = [usuario.transacoes.transacao(total_quentes - 1 - i, self.descricoes)
+                  for i in range(inicio, min(inicio + quantidade, total_quentes))]
+        faltam = quantidade - len(pagina)
+        if faltam > 0:
+            await self.confirmar()
+            loop = asyncio.get_running_loop()
+            with metricas.cronometrar("armazenamento_segundos", operacao="ler_arquivo"):
+                pagina += await loop.run_in_executor(
+                    self._executor, self.armazenamento.ler_arquivo, uid, max(0, inicio - total_quentes), faltam)
+        return pagina
+
+    async def resumo_arquivo(self, user_id):
+        metricas.contar("livro_leituras", leitura="resumo_arquivo")
+        await self.confirmar()
+        loop = asyncio.get_running_loop()
+        with metricas.cronometrar("armazenamento_segundos", operacao="resumo_arquivo"):
+            return await loop.run_in_executor(self._executor, self.armazenamento.resumo_arquivo, str(user_id))
+
+    def _conferir_intervalo(self, valores, liquido):
+        # O histórico guarda int64: um valor ou saldo fora disso estouraria
+        # em registrar_transacao depois de o saldo já ter mudado.
+        if not all(cabe(valor) for valor in valores) or \
+                not all(cabe(self.saldo(uid) + valor) for uid, valor in liquido.items()):
+            raise ValueError("Valor fora do intervalo")
+
+    def lancar(self, user_id, valor, descricao):
+        # Crédito (valor positivo) ou débito com o lançamento no extrato
+        self._conferir_intervalo([valor], {str(user_id): valor})
+        self.alterar_saldo(user_id, valor)
+        self.registrar_transacao(user_id, "receita" if valor > 0 else "despesa", abs(valor), descricao)
+
+    def transferir(self, de, para, valor, descricao_despesa, descricao_receita):
+        self.aplicar_lote([(de, -valor, descricao_despesa), (para, valor, descricao_receita)])
+
+    def aplicar_lote(self, movimentos):
+        # movimentos: [(user_id, valor, descricao)], valor negativo debita.
+        # Tudo é validado antes de qualquer alteração e entra na mesma
+        # gravação: ou o lote inteiro é persistido, ou nada. Cada usuário
+        # tem o saldo alterado uma vez só, pelo valor líquido.
+        liquido = {}
+        for user_id, valor, _ in movimentos:
+            uid = str(user_id)
+            liquido[uid] = liquido.get(uid, 0) + valor
+        self._conferir_intervalo([valor for _, valor, _ in movimentos], liquido)
+        for uid, valor in liquido.items():
+            if valor < 0 and self.saldo_disponivel(uid) < -valor:
+                raise SaldoInsuficiente(uid)
+        for uid, valor in liquido.items():
+            if valor:
+                self.alterar_saldo(uid, valor)
+        for user_id, valor, descricao in movimentos:
+            self.registrar_transacao(user_id, "receita" if valor > 0 else "despesa", abs(valor), descricao)
+
+    # === Reservas ===
+    # Um jogo reserva a aposta quando começa e libera a reserva quando
+    # termina (antes de liquidar), assim o mesmo saldo não cobre dois jogos.
+    def saldo_disponivel(self, user_id):
+        return self.saldo(user_id) - self.reservado.get(str(user_id), 0)
+
+    def reservar(self, user_id, valor):
+        # Reserva negativa aumentaria o saldo disponível acima do saldo real
+        if valor <= 0:
+            raise ValueError(f"Reserva precisa de valor positivo: {valor}")
+        if self.saldo_disponivel(user_id) < valor:
+            raise SaldoInsuficiente(user_id)
+        uid = str(user_id)
+        self.reservado[uid] = self.reservado.get(uid, 0) + valor
+        return Reserva(uid, valor)
+
+    def liberar(self, *reservas):
+        for reserva in reservas:
+            if reserva is None or not reserva.ativa:
+                continue
+            reserva.ativa = False
+            restante = self.reservado[reserva.user_id] - reserva.valor
+            if restante:
+                self.reservado[reserva.user_id] = restante
+            else:
+                del self.reservado[reserva.user_id]
+
+    def liquidar(self, reservas, movimentos):
+        # Fim de jogo: libera as reservas e aplica o lote numa chamada só
+        # (no modo cluster, uma ida ao processo do livro). Se o lote for
+        # recusado, as reservas voltam a valer.
+        ativas = [reserva for reserva in reservas if reserva is not None and reserva.ativa]
+        self.liberar(*ativas)
+        try:
+            self.aplicar_lote(movimentos)
+        except SaldoInsuficiente:
+            for reserva in ativas:
+                reserva.ativa = True
+                self.reservado[reserva.user_id] = self.reservado.get(reserva.user_id, 0) + reserva.valor
+            raise
+
+    # === Cooldowns ===
+    def restante_cooldown(self, nome, user_id):
+        return self.cooldowns.restante(nome, str(user_id))
+
+    def iniciar_cooldown(self, nome, user_id, duracao=None):
+        uid = str(user_id)
+        expira = agora() + (DURACOES[nome] if duracao is None else duracao)
+        self.cooldowns.definir(nome, uid, expira)
+        self.registrar("cooldown", uid, [nome, expira])
+
+    def resgatar(self, nome, user_id, valor, descricao):
+        # Confere o cooldown, inicia e paga de uma vez; com vários processos
+        # de shard isso impede que o mesmo daily seja pago duas vezes.
+        # Retorna os segundos restantes, ou 0 se pagou.
+        restante = self.restante_cooldown(nome, user_id)
+        if restante:
+            return restante
+        self.iniciar_cooldown(nome, user_id)
+        self.lancar(user_id, valor, descricao)
+        return 0
+
+    # === Ranking ===
+    def pagina_ranking(self, inicio, quantidade):
+        return self.ranking.pagina(inicio, quantidade)
+
+    def posicao_ranking(self, user_id):
+        return self.ranking.posicao(str(user_id))
+
+    def total_ranking(self):
+        return len(self.ranking)
+
+    # === Economia ===
+    def resumo_economia(self, dias=7):
+        metricas.contar("livro_leituras", leitura="resumo_economia")
+        return self.agregados.resumo(dias)
+
+    def substituir_economia(self, economia):
+        # Agregados recalculados do histórico (python agregados.py --gravar).
+        # A operação leva uma cópia: o diário só a serializa depois, quando
+        # os agregados em memória já podem ter mudado.
+        self.dados["economia"] = self.agregados.economia = economia
+        self.registrar("economia", None, copy.deepcopy(economia))
+
+    # === VIPs ===
+    def vip(self, user_id):
+        return self.dados["vips"].get(str(user_id))
+
+    def eh_vip(self, user_id):
+        return self.indice_vips.ativo(str(user_id), time.time())
+
+    def emoji_vip(self, user_id):
+        vip = self.vip(user_id)
+        if vip and vip.get("custom") and self.eh_vip(user_id):
+            return vip["custom"]
+        return None
+
+    def definir_vip(self, user_id, vip):
+        uid = str(user_id)
+        if vip is None:
+            self.dados["vips"].pop(uid, None)
+        else:
+            self.dados["vips"][uid] = vip
+        self.indice_vips.definir(uid, vip)
+        if self._vips_alterados is not None:
+            self._vips_alterados.set()
+        self.registrar("vip", uid, dict(vip) if vip is not None else None)
+
+    async def _expirar_vips(self):
+        # Dorme até o próximo vencimento (ou até um VIP ser alterado) e
+        # remove os vencidos na hora certa.
+        while True:
+            proxima = self.indice_vips.proxima()
+            espera = None if proxima is None else max(0.0, proxima - time.time())
+            self._vips_alterados.clear()
+            try:
+                await asyncio.wait_for(self._vips_alterados.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+            for uid in self.indice_vips.vencidos(time.time()):
+                vip = self.vip(uid)
+                self.definir_vip(uid, None)
+                if self.ao_expirar_vip is not None:
+                    try:
+                        await self.ao_expirar_vip(uid, vip)
+                    except Exception:
+                        log.exception("Falha ao avisar VIP expirado %s", uid)
+
+    # === Autorizados ===
+    # IDs sempre int; o conjunto em memória responde eh_autorizado sem
+    # tocar no disco e a lista em dados é só o que vai para o armazenamento.
+    def _carregar_autorizados(self):
+        self.autorizados = set()
+        for user_id in list(self.dados["autorizados"]):
+            if not isinstance(user_id, int):
+                # IDs gravados como texto por versões antigas do baddgive
+                self.dados["autorizados"].remove(user_id)
+                self.registrar("autorizado", user_id, False)
+                if int(user_id) not in self.dados["autorizados"]:
+                    self.dados["autorizados"].append(int(user_id))
+                    self.registrar("autorizado", int(user_id), True)
+        self.autorizados = set(self.dados["autorizados"])
+
+    def eh_autorizado(self, user_id):
+        return int(user_id) in self.autorizados
+
+    def adicionar_autorizado(self, user_id):
+        user_id = int(user_id)
+        if user_id not in self.autorizados:
+            self.autorizados.add(user_id)
+            self.dados["autorizados"].append(user_id)
+            self.registrar("autorizado", user_id, True)
+
+    def remover_autorizado(self, user_id):
+        user_id = int(user_id)
+        if user_id in self.autorizados:
+            self.autorizados.discard(user_id)
+            self.dados["autorizados"].remove(user_id)
+            self.registrar("autorizado", user_id, False)
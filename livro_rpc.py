@@ -0,0 +1,338 @@
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import signal
+
+from livro_caixa import SaldoInsuficiente
+
+log = logging.getLogger(__name__)
+
+# Operações do livro caixa disponíveis para os cogs. Em um processo só elas
+# vão direto ao LivroCaixa (LivroLocal); no modo cluster (ver cluster.py)
+# cada shard fala com o processo do livro por um socket local (LivroRemoto).
+METODOS = frozenset({
+    "saldo", "saldo_disponivel", "lancar", "transferir", "aplicar_lote",
+    "reservar", "liberar", "liquidar", "extrato", "resumo_arquivo", "confirmar",
+    "restante_cooldown", "iniciar_cooldown", "resgatar",
+    "pagina_ranking", "posicao_ranking", "total_ranking", "resumo_economia",
+    "vip", "eh_vip", "emoji_vip", "definir_vip",
+    "eh_autorizado", "adicionar_autorizado", "remover_autorizado",
+})
+# Erros que voltam para o shard com o mesmo tipo (recriados a partir do
+# argumento enviado)
+ERROS = {"SaldoInsuficiente": SaldoInsuficiente, "ValueError": ValueError}
+# Tamanho máximo de uma mensagem (uma linha de JSON); um badicionar de um
+# cargo grande vai num pedido só
+LIMITE_LINHA = 2 ** 26
+# Segundos que um shard espera pela resposta de uma chamada antes de
+# desistir dela, para um livro travado não travar todos os shards
+TEMPO_CHAMADA = 15.0
+# Sem conexão, as chamadas falham na hora; a reconexão é tentada na
+# próxima chamada, com espera entre tentativas dobrando até o máximo
+RECONEXAO_MINIMA = 0.5
+RECONEXAO_MAXIMA = 30.0
+
+
+# === Endereços ===
+# "unix:/caminho/do.sock" ou "host:porta" (loopback)
+async def conectar(endereco):
+    if endereco.startswith("unix:"):
+        return await asyncio.open_unix_connection(endereco[5:], limit=LIMITE_LINHA)
+    host, porta = endereco.rsplit(":", 1)
+    return await asyncio.open_connection(host, int(porta), limit=LIMITE_LINHA)
+
+
+async def escutar(endereco, atender):
+    if endereco.startswith("unix:"):
+        return await asyncio.start_unix_server(atender, endereco[5:], limit=LIMITE_LINHA)
+    host, porta = endereco.rsplit(":", 1)
+    return await asyncio.start_server(atender, host, int(porta), limit=LIMITE_LINHA)
+
+
+def codificar(mensagem):
+    return (json.dumps(mensagem, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+def codificar_erro(erro):
+    if isinstance(erro, SaldoInsuficiente):
+        return type(erro).__name__, erro.user_id
+    return type(erro).__name__, str(erro)
+
+
+# === Livro no mesmo processo ===
+class LivroLocal:
+    def __init__(self, livro):
+        self.livro = livro
+
+    @property
+    def ao_expirar_vip(self):
+        return self.livro.ao_expirar_vip
+
+    @ao_expirar_vip.setter
+    def ao_expirar_vip(self, callback):
+        self.livro.ao_expirar_vip = callback
+
+    async def abrir(self):
+        if not self.livro.carregado:
+            self.livro.carregar()
+            self.livro.iniciar()
+
+    async def fechar(self):
+        # Garante que nada pendente no livro caixa se perca no desligamento
+        await self.livro.encerrar()
+
+    def __getattr__(self, nome):
+        if nome not in METODOS:
+            raise AttributeError(nome)
+        metodo = getattr(self.livro, nome)
+
+        async def chamar(*args):
+            faltam = self.livro.faltam_hidratar(nome, args)
+            if faltam:
+                await self.livro.garantir_usuarios(faltam)
+            resultado = metodo(*args)
+            if inspect.isawaitable(resultado):
+                resultado = await resultado
+            return resultado
+
+        setattr(self, nome, chamar)
+        return chamar
+
+
+# === Livro em outro processo ===
+# Uma conexão por shard; pedidos e respostas são linhas de JSON
+# [id, metodo, args] -> [id, resultado] ou [id, None, erro, argumento].
+# Reservas viram ids no processo do livro. Avisos do livro chegam com id
+# null, ex.: [null, "vip_expirado", [uid, vip]].
+# Se a conexão cai, as chamadas em andamento e as seguintes recebem
+# ConnectionError (o comando falha, o shard segue) até uma reconexão dar
+# certo. Reservas da conexão antiga já foram devolvidas pelo livro.
+class LivroRemoto:
+    def __init__(self, endereco, tempo_chamada=TEMPO_CHAMADA):
+        self.endereco = endereco
+        self.tempo_chamada = tempo_chamada
+        self.ao_expirar_vip = None
+        self._ids = itertools.count(1)
+        self._pendentes = {}
+        self._escritor = None
+        self._leitor = None
+        self._fechado = False
+        self._reconexao = asyncio.Lock()
+        self._espera = RECONEXAO_MINIMA
+        self._proxima_tentativa = 0.0
+
+    async def abrir(self):
+        self._fechado = False
+        leitor, escritor = await conectar(self.endereco)
+        self._escritor = escritor
+        self._leitor = asyncio.create_task(self._ler(leitor, escritor))
+
+    async def fechar(self):
+        self._fechado = True
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        if self._leitor is not None:
+            await self._leitor
+            self._leitor = None
+
+    def __getattr__(self, nome):
+        if nome not in METODOS:
+            raise AttributeError(nome)
+
+        async def chamar(*args):
+            return await self._chamar(nome, args)
+
+        setattr(self, nome, chamar)
+        return chamar
+
+    async def _chamar(self, metodo, args):
+        if self._escritor is None:
+            await self._reconectar()
+        id_ = next(self._ids)
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes[id_] = futuro
+        self._escritor.write(codificar([id_, metodo, args]))
+        try:
+            return await asyncio.wait_for(futuro, self.tempo_chamada)
+        except asyncio.TimeoutError:
+            # A operação pode ainda ser aplicada pelo livro; só paramos de esperar
+            self._pendentes.pop(id_, None)
+            raise TimeoutError(f"O livro caixa não respondeu a {metodo} em {self.tempo_chamada:g}s") from None
+
+    async def _reconectar(self):
+        if self._fechado:
+            raise ConnectionError("Conexão com o livro caixa fechada")
+        async with self._reconexao:
+            if self._escritor is not None:
+                return
+            loop = asyncio.get_running_loop()
+            if loop.time() < self._proxima_tentativa:
+                raise ConnectionError("Sem conexão com o livro caixa")
+            try:
+                await asyncio.wait_for(self.abrir(), self.tempo_chamada)
+            except (OSError, asyncio.TimeoutError) as erro:
+                self._proxima_tentativa = loop.time() + self._espera
+                self._espera = min(self._espera * 2, RECONEXAO_MAXIMA)
+                raise ConnectionError(f"Sem conexão com o livro caixa: {erro}") from None
+            self._espera = RECONEXAO_MINIMA
+            log.info("Reconectado ao livro caixa em %s", self.endereco)
+
+    async def _ler(self, leitor, escritor):
+        try:
+            while linha := await leitor.readline():
+                id_, *resposta = json.loads(linha)
+                if id_ is None:
+                    self._aviso(*resposta)
+                    continue
+                futuro = self._pendentes.pop(id_, None)
+                if futuro is None or futuro.done():
+                    continue
+                if len(resposta) == 1:
+                    futuro.set_result(resposta[0])
+                else:
+                    _, erro, argumento = resposta
+                    futuro.set_exception(ERROS[erro](argumento) if erro in ERROS else RuntimeError(f"{erro}: {argumento}"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Daqui em diante _chamar falha na hora (ou reconecta) em vez de
+            # escrever num transporte fechado e esperar para sempre
+            if self._escritor is escritor:
+                self._escritor = None
+                if not self._fechado:
+                    log.warning("Conexão com o livro caixa perdida")
+            escritor.close()
+            pendentes, self._pendentes = self._pendentes, {}
+            for futuro in pendentes.values():
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("Conexão com o livro caixa perdida"))
+
+    def _aviso(self, evento, args):
+        if evento == "vip_expirado" and self.ao_expirar_vip is not None:
+            asyncio.create_task(self._avisar_vip_expirado(*args))
+
+    async def _avisar_vip_expirado(self, uid, vip):
+        try:
+            await self.ao_expirar_vip(uid, vip)
+        except Exception:
+            log.exception("Falha ao avisar VIP expirado %s", uid)
+
+
+# === Processo do livro ===
+class _Conexao:
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.reservas = set()
+
+
+class ServidorLivro:
+    def __init__(self, livro):
+        self.livro = livro
+        self.reservas = {}
+        self._ids = itertools.count(1)
+        self.conexoes = []
+        livro.ao_expirar_vip = self.avisar_vip_expirado
+
+    async def avisar_vip_expirado(self, uid, vip):
+        # Só o shard conectado há mais tempo avisa, senão o usuário
+        # receberia uma DM por processo
+        if self.conexoes:
+            self.conexoes[0].escritor.write(codificar([None, "vip_expirado", [uid, vip]]))
+
+    async def atender(self, leitor, escritor):
+        conexao = _Conexao(escritor)
+        self.conexoes.append(conexao)
+        try:
+            while linha := await leitor.readline():
+                id_, metodo, args = json.loads(linha)
+                if metodo in METODOS and inspect.iscoroutinefunction(getattr(self.livro, metodo)):
+                    asyncio.create_task(self._responder_depois(conexao, id_, metodo, args))
+                elif metodo in METODOS and (faltam := self.livro.faltam_hidratar(metodo, args)):
+                    asyncio.create_task(self._hidratar_e_responder(conexao, id_, metodo, args, faltam))
+                else:
+                    self._responder(conexao, id_, metodo, args)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Jogos do shard que caiu não terminam mais: devolve o saldo
+            self.conexoes.remove(conexao)
+            self.livro.liberar(*(self.reservas.pop(id_) for id_ in conexao.reservas))
+            escritor.close()
+
+    def _responder(self, conexao, id_, metodo, args):
+        try:
+            resposta = [id_, self._executar(conexao, metodo, args)]
+        except Exception as erro:
+            resposta = [id_, None, *codificar_erro(erro)]
+        conexao.escritor.write(codificar(resposta))
+
+    async def _hidratar_e_responder(self, conexao, id_, metodo, args, faltam):
+        # O método em si continua síncrono: roda inteiro depois da leitura
+        try:
+            await self.livro.garantir_usuarios(faltam)
+        except Exception as erro:
+            if not conexao.escritor.is_closing():
+                conexao.escritor.write(codificar([id_, None, *codificar_erro(erro)]))
+            return
+        if not conexao.escritor.is_closing():
+            self._responder(conexao, id_, metodo, args)
+
+    async def _responder_depois(self, conexao, id_, metodo, args):
+        try:
+            resposta = [id_, await getattr(self.livro, metodo)(*args)]
+        except Exception as erro:
+            resposta = [id_, None, *codificar_erro(erro)]
+        if not conexao.escritor.is_closing():
+            conexao.escritor.write(codificar(resposta))
+
+    def _executar(self, conexao, metodo, args):
+        if metodo not in METODOS:
+            raise AttributeError(metodo)
+        if metodo == "reservar":
+            reserva = self.livro.reservar(*args)
+            id_ = next(self._ids)
+            self.reservas[id_] = reserva
+            conexao.reservas.add(id_)
+            return id_
+        if metodo == "liberar":
+            self.livro.liberar(*self._tirar_reservas(conexao, args))
+            return None
+        if metodo == "liquidar":
+            ids, movimentos = args
+            self.livro.liquidar([self.reservas.get(id_) for id_ in ids if id_ in conexao.reservas], movimentos)
+            self._tirar_reservas(conexao, ids)
+            return None
+        return getattr(self.livro, metodo)(*args)
+
+    def _tirar_reservas(self, conexao, ids):
+        reservas = []
+        for id_ in ids:
+            if id_ in conexao.reservas:
+                conexao.reservas.discard(id_)
+                reservas.append(self.reservas.pop(id_))
+        return reservas
+
+
+async def servir_livro(livro, endereco, parar=None):
+    # Roda até SIGTERM/SIGINT (ou até "parar" ser setado) e encerra o livro
+    # gravando tudo o que estiver pendente.
+    if not livro.carregado:
+        livro.carregar()
+    livro.iniciar()
+    servidor = ServidorLivro(livro)
+    escuta = await escutar(endereco, servidor.atender)
+    parar = parar or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sinal, parar.set)
+    log.info("Livro caixa ouvindo em %s", endereco)
+    try:
+        await parar.wait()
+    finally:
+        escuta.close()
+        for conexao in list(servidor.conexoes):
+            conexao.escritor.close()
+        await livro.encerrar()
@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# Limites (segundos) dos baldes dos histogramas de latência
+BALDES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIXO = "banguela"
+
+
+# === Histograma ===
+# Contagem por balde (não acumulada); a exposição acumula na hora de
+# escrever, como o Prometheus espera.
+class Histograma:
+    __slots__ = ("contagens", "soma", "total")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BALDES) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(BALDES, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def percentil(self, p):
+        # Limite superior do balde onde cai o percentil p (0..1)
+        if not self.total:
+            return 0.0
+        alvo = p * self.total
+        acumulado = 0
+        for limite, contagem in zip(BALDES + (float("inf"),), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return float("inf")
+
+
+# === Registro ===
+# Um registro só para o processo inteiro. As gravações acontecem na thread
+# do livro caixa e os comandos no loop de eventos, por isso a trava.
+class Metricas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+        # Valores que sobem e descem (limites, itens em andamento)
+        self.medidores = {}
+
+    def contar(self, nome, quantidade=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + quantidade
+
+    def definir(self, nome, valor, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self.medidores[chave] = valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            histograma = self.histogramas.get(chave)
+            if histograma is None:
+                histograma = self.histogramas[chave] = Histograma()
+            histograma.observar(segundos)
+
+    @contextmanager
+    def cronometrar(self, nome, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def total(self, nome):
+        # Soma de um contador em todos os rótulos
+        with self._trava:
+            return sum(valor for (n, _), valor in self.contadores.items() if n == nome)
+
+    def por_rotulo(self, nome, rotulo):
+        # {valor do rótulo: histograma} de uma métrica; usado no bstats
+        with self._trava:
+            return {dict(rotulos)[rotulo]: h for (n, rotulos), h in self.histogramas.items()
+                    if n == nome and rotulo in dict(rotulos)}
+
+    def exposicao(self):
+        # Formato texto do Prometheus (versão 0.0.4)
+        with self._trava:
+            contadores = sorted(self.contadores.items())
+            medidores = sorted(self.medidores.items())
+            histogramas = sorted((chave, (list(h.contagens), h.soma, h.total))
+                                 for chave, h in self.histogramas.items())
+        linhas = []
+        tipo_escrito = set()
+        for (nome, rotulos), valor in contadores:
+            nome = f"{PREFIXO}_{nome}_total"
+            if nome not in tipo_escrito:
+                linhas.append(f"# TYPE {nome} counter")
+                tipo_escrito.add(nome)
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), valor in medidores:
+            nome = f"{PREFIXO}_{nome}"
+            if nome not in tipo_escrito:
+                linhas.append(f"# TYPE {nome} gauge")
+                tipo_escrito.add(nome)
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+        for (nome, rotulos), (contagens, soma, total) in histogramas:
+            nome = f"{PREFIXO}_{nome}"
+            if nome not in tipo_escrito:
+                linhas.append(f"# TYPE {nome} histogram")
+                tipo_escrito.add(nome)
+            acumulado = 0
+            for limite, contagem in zip(BALDES + ("+Inf",), contagens):
+                acumulado += contagem
+                linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', str(limite)),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+        return "\n".join(linhas) + "\n"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + "}"
+
+
+metricas = Metricas()
+
+
+# === Endpoint HTTP ===
+# Só escuta em localhost: o Prometheus (ou um curl) roda na mesma máquina.
+async def servir(host, porta, registro=metricas):
+    async def responder(request):
+        return web.Response(text=registro.exposicao(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", responder)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, porta).start()
+    return runner
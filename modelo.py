@@ -0,0 +1,133 @@
+import time
+from array import array
+from datetime import datetime
+
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+TIPOS = ("receita", "despesa")
+_CODIGO_TIPO = {tipo: i for i, tipo in enumerate(TIPOS)}
+
+
+# === Dinheiro ===
+# Em memória todo valor é inteiro, em centavos. O formato gravado continua
+# em reais (int quando não há centavos), como no financas.json original.
+# Valores e saldos têm de caber no array("q") do histórico (int64).
+VALOR_MAXIMO = 2 ** 63 - 1
+
+
+def cabe(valor_centavos):
+    return -VALOR_MAXIMO <= valor_centavos <= VALOR_MAXIMO
+
+
+def centavos(reais):
+    return int(round(reais * 100))
+
+
+def reais(valor_centavos):
+    if valor_centavos % 100 == 0:
+        return valor_centavos // 100
+    return valor_centavos / 100
+
+
+def formatar(valor_centavos):
+    return f"R$ {valor_centavos / 100:,.2f}"
+
+
+def data_para_epoch(texto):
+    return int(datetime.fromisoformat(texto).timestamp())
+
+
+def epoch_para_data(epoch):
+    return time.strftime(FORMATO_DATA, time.localtime(epoch))
+
+
+# === Descrições ===
+# Cada texto de descrição é guardado uma vez só; as transações guardam o
+# índice.
+class Descricoes:
+    def __init__(self):
+        self._textos = []
+        self._indices = {}
+
+    def __len__(self):
+        return len(self._textos)
+
+    def indice(self, texto):
+        indice = self._indices.get(texto)
+        if indice is None:
+            indice = self._indices[texto] = len(self._textos)
+            self._textos.append(texto)
+        return indice
+
+    def texto(self, indice):
+        return self._textos[indice]
+
+
+# === Histórico em colunas ===
+class Historico:
+    __slots__ = ("datas", "valores", "tipos", "descricoes")
+
+    def __init__(self):
+        self.datas = array("q")
+        self.valores = array("q")
+        self.tipos = array("b")
+        self.descricoes = array("I")
+
+    def __len__(self):
+        return len(self.datas)
+
+    def adicionar(self, data, tipo, valor, descricao):
+        self.datas.append(data)
+        self.valores.append(valor)
+        self.tipos.append(_CODIGO_TIPO[tipo])
+        self.descricoes.append(descricao)
+
+    def transacao(self, i, descricoes):
+        return {
+            "tipo": TIPOS[self.tipos[i]],
+            "valor": reais(self.valores[i]),
+            "descricao": descricoes.texto(self.descricoes[i]),
+            "data": epoch_para_data(self.datas[i])
+        }
+
+    def exportar(self, descricoes, inicio=0, fim=None):
+        fim = len(self) if fim is None else fim
+        return [self.transacao(i, descricoes) for i in range(inicio, fim)]
+
+    def remover_antigas(self, quantidade):
+        for coluna in (self.datas, self.valores, self.tipos, self.descricoes):
+            del coluna[:quantidade]
+
+
+class Usuario:
+    __slots__ = ("saldo", "transacoes")
+
+    def __init__(self, saldo=0):
+        self.saldo = saldo
+        self.transacoes = Historico()
+
+    @classmethod
+    def importar(cls, registro, descricoes):
+        usuario = cls(centavos(registro.get("saldo", 0)))
+        for t in registro.get("transacoes", []):
+            usuario.transacoes.adicionar(data_para_epoch(t["data"]), t["tipo"], centavos(t["valor"]),
+                                         descricoes.indice(t["descricao"]))
+        return usuario
+
+    def exportar(self, descricoes):
+        return {"saldo": reais(self.saldo), "transacoes": self.transacoes.exportar(descricoes)}
+
+
+# === Entrada do usuário ===
+# "10k", "1,5m", "2kk" -> centavos
+def parse_valor(texto):
+    texto = texto.lower().replace(",", ".")
+    multiplicador = 1
+    for sufixo, fator in (("kk", 1_000_000), ("k", 1_000), ("m", 1_000_000)):
+        if texto.endswith(sufixo):
+            texto, multiplicador = texto[:-len(sufixo)], fator
+            break
+    valor = float(texto) * multiplicador
+    # inf/nan e valores que não cabem no histórico são entrada inválida
+    if not abs(valor) * 100 < VALOR_MAXIMO:
+        raise ValueError(f"Valor fora do intervalo: {texto}")
+    return centavos(valor)
@@ -0,0 +1,33 @@
+from sortedcontainers import SortedList
+
+
+# === Ranking de saldos ===
+# Índice ordenado por (-saldo, uid), atualizado a cada mudança de saldo.
+# Posição e páginas saem em O(log n) sem varrer todos os usuários.
+class Ranking:
+    def __init__(self):
+        self._ordem = SortedList()
+        self._saldos = {}
+
+    def __len__(self):
+        return len(self._ordem)
+
+    def reconstruir(self, saldos):
+        self._saldos = dict(saldos)
+        self._ordem = SortedList((-saldo, uid) for uid, saldo in self._saldos.items())
+
+    def atualizar(self, uid, saldo):
+        anterior = self._saldos.get(uid)
+        if anterior is not None:
+            self._ordem.remove((-anterior, uid))
+        self._saldos[uid] = saldo
+        self._ordem.add((-saldo, uid))
+
+    def posicao(self, uid):
+        saldo = self._saldos.get(uid)
+        if saldo is None:
+            return None
+        return self._ordem.bisect_left((-saldo, uid)) + 1
+
+    def pagina(self, inicio, quantidade):
+        return [(uid, -saldo) for saldo, uid in self._ordem[inicio:inicio + quantidade]]
@@ -0,0 +1,109 @@
+from discord.ext import commands
+
+from admissao import Admissao
+from componentes import Estados, Roteador
+from concorrencia import TravasUsuarios
+from edicoes import EditorMensagens
+
+
+# === Serviços compartilhados ===
+# Criados uma vez pelo bot.py e guardados em bot.servicos: recarregar um
+# cog troca o código dos comandos, mas o livro caixa, as travas e os jogos
+# em andamento continuam os mesmos.
+class Servicos:
+    def __init__(self, livro):
+        self.livro = livro
+        self.travas = TravasUsuarios()
+        # Lobbies editados a cada clique passam por aqui (ver edicoes.py)
+        self.editor = EditorMensagens()
+        # Botões e menus são roteados pelo custom_id (ver componentes.py);
+        # o estado que não cabe no id fica em "estados".
+        self.roteador = Roteador()
+        self.estados = Estados()
+        # Baldes de fichas e limite de comandos em andamento (ver
+        # admissao.py), aplicados no before_invoke do bot e aos cliques
+        # que o roteador despacha
+        self.admissao = Admissao()
+
+    async def saldo(self, user_id):
+        return await self.livro.saldo(user_id)
+
+    async def resgatar(self, nome, user_id, valor, descricao):
+        # Recompensa com cooldown (daily, work...): retorna os segundos que
+        # faltam, ou 0 depois de pagar e gravar.
+        restante = await self.livro.resgatar(nome, user_id, valor, descricao)
+        if not restante:
+            await self.livro.confirmar()
+        return restante
+
+
+# === Pote ===
+# Apostas de jogos com vários participantes: cada entrada só reserva o
+# valor (nada é gravado) e a liquidação debita todos e paga os prêmios num
+# único lote, qualquer que seja o número de jogadores.
+class Pote:
+    def __init__(self, livro, valor):
+        self.livro = livro
+        self.valor = valor
+        self.reservas = {}
+        self.fechado = False
+
+    def __len__(self):
+        return len(self.reservas)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self.reservas
+
+    @property
+    def total(self):
+        return self.valor * len(self.reservas)
+
+    async def entrar(self, user_id):
+        uid = str(user_id)
+        if self.fechado or uid in self.reservas:
+            return False
+        reserva = await self.livro.reservar(uid, self.valor)
+        # O pote pode ter fechado (ou o mesmo clique chegado duas vezes)
+        # enquanto a reserva era feita
+        if self.fechado or uid in self.reservas:
+            await self.livro.liberar(reserva)
+            return False
+        self.reservas[uid] = reserva
+        return True
+
+    async def sair(self, user_id):
+        reserva = self.reservas.pop(str(user_id), None)
+        await self.livro.liberar(reserva)
+
+    async def cancelar(self):
+        self.fechado = True
+        await self.livro.liberar(*self.reservas.values())
+
+    async def liquidar(self, premios, descricao_aposta, descricao_premio):
+        # premios: {user_id: valor}; a soma tem de ser o pote inteiro
+        premios = {str(uid): valor for uid, valor in premios.items()}
+        if sum(premios.values()) != self.total:
+            raise ValueError("Os prêmios não fecham com o total do pote")
+        self.fechado = True
+        movimentos = [(uid, -self.valor, descricao_aposta) for uid in self.reservas]
+        movimentos += [(uid, valor, descricao_premio) for uid, valor in premios.items() if valor]
+        await self.livro.liquidar(list(self.reservas.values()), movimentos)
+
+
+# Base dos cogs: atalhos para os serviços e registro das rotas de
+# componentes junto com o cog (e remoção no unload/reload).
+class CogBanguela(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.servicos = bot.servicos
+        self.livro = bot.servicos.livro
+        self.travas = bot.servicos.travas
+        self.editor = bot.servicos.editor
+        self.roteador = bot.servicos.roteador
+        self.estados = bot.servicos.estados
+
+    async def cog_load(self):
+        self.roteador.adicionar_cog(self)
+
+    async def cog_unload(self):
+        self.roteador.remover_cog(self)
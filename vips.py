@@ -0,0 +1,56 @@
+import heapq
+from datetime import datetime
+
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+
+def para_epoch(texto):
+    return datetime.strptime(texto, FORMATO_DATA).timestamp()
+
+
+# === Índice de VIPs ===
+# A data de expiração é convertida uma única vez, quando o VIP é carregado
+# ou definido. O heap diz qual é o próximo a vencer; entradas antigas (VIP
+# renovado ou removido) são ignoradas quando chegam ao topo.
+class IndiceVips:
+    def __init__(self):
+        self.expiracoes = {}
+        self._heap = []
+
+    def __contains__(self, uid):
+        return uid in self.expiracoes
+
+    def reconstruir(self, vips):
+        self.expiracoes = {uid: para_epoch(vip["expira_em"]) for uid, vip in vips.items()}
+        self._heap = [(expira, uid) for uid, expira in self.expiracoes.items()]
+        heapq.heapify(self._heap)
+
+    def definir(self, uid, vip):
+        if vip is None:
+            self.expiracoes.pop(uid, None)
+            return
+        expira = para_epoch(vip["expira_em"])
+        self.expiracoes[uid] = expira
+        heapq.heappush(self._heap, (expira, uid))
+
+    def ativo(self, uid, momento):
+        expira = self.expiracoes.get(uid)
+        return expira is not None and expira > momento
+
+    def _descartar_antigos(self):
+        while self._heap and self.expiracoes.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def proxima(self):
+        self._descartar_antigos()
+        return self._heap[0][0] if self._heap else None
+
+    def vencidos(self, momento):
+        uids = []
+        self._descartar_antigos()
+        while self._heap and self._heap[0][0] <= momento:
+            _, uid = heapq.heappop(self._heap)
+            del self.expiracoes[uid]
+            uids.append(uid)
+            self._descartar_antigos()
+        return uids